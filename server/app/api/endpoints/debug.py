@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from app.services import profiler
+
+router = APIRouter()
+
+def require_token(x_profile_token: Optional[str] = Header(None)):
+    # PROFILE_TOKEN verilmemişse debug uçları hiç yokmuş gibi davranır (yavaş sorgular yine de loglanır)
+    if not profiler.check_token(x_profile_token):
+        raise HTTPException(status_code=404, detail="Not found")
+
+@router.get("/profiles", dependencies=[Depends(require_token)])
+async def list_profiles():
+    return profiler.profiles()
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_token)])
+async def get_profile(profile_id: int):
+    profile = profiler.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@router.get("/slow-queries", dependencies=[Depends(require_token)])
+async def list_slow_queries(limit: int = 100):
+    return list(reversed(profiler.slow_queries))[:max(1, limit)]
+
+@router.delete("/profiles", dependencies=[Depends(require_token)])
+async def clear_profiles():
+    profiler.clear()
+    return {"message": "Cleared"}
@@ -1,7 +1,45 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from app.db.session import AsyncSessionLocal
+from app.models.music import ScanJob
+from app.services import watcher, library, lyrics, search_index, startup, scan_jobs
 
 router = APIRouter()
 
+async def _initial_scan(db):
+    job = await db.get(ScanJob, startup.job_id) if startup.job_id is not None else None
+    return scan_jobs.job_dict(job) if job else None
+
 @router.get("/")
 async def health_check():
-    return {"status": "ok", "message": "yaşıyorum tamam."}
+    async with AsyncSessionLocal() as db:
+        initial_scan = await _initial_scan(db)
+    return {"status": "ok", "message": "yaşıyorum tamam.", "initial_scan": initial_scan}
+
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness():
+    # db cevap veriyorsa hazırız; açılış taraması sürerken de trafik alınır
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+            initial_scan = await _initial_scan(db)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "detail": str(e)})
+    return {
+        "status": "ready",
+        "search_index_ready": search_index.index.ready,
+        "initial_scan": initial_scan,
+    }
+
+@router.get("/watcher")
+async def watcher_status():
+    return watcher.stats()
+
+@router.get("/cache")
+async def cache_status():
+    return {"search": library.search_cache.stats(), "lyrics": lyrics.stats}
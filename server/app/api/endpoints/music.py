@@ -1,171 +1,262 @@
 
 import os
+import json
+import hashlib
 import mimetypes
-from typing import Optional
+from typing import Optional, List, Literal
+from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, Header, Request
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.services import scanner, library
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db, get_read_db, get_async_db, ReadSessionLocal, AsyncSessionLocal
+from app.services import scan_jobs, library, versions, queries, browse, streaming, covers, thumbnails, lyrics, prefetch, seek, playlists
 from app.models.music import Track, Album
+from app.core.config import settings
 
 router = APIRouter()
 
-@router.post("/scan")
-def scan_music_library(directory: Optional[str] = None, db: Session = Depends(get_db)):
-    result = scanner.scan_library(db, directory)
-    return result
-
-@router.get("/search")
-def search_tracks(q: str, limit: int = 50, db: Session = Depends(get_db)):
-    results = library.search(db, q, limit)
-    return [
-        {
-            "id": t.id,
-            "title": t.title,
-            "artist": t.artist.name,
-            "album": t.album.title,
-            "duration": t.duration,
-            "album_id": t.album_id,
-            "has_cover": bool(t.album.cover_image_path and os.path.exists(t.album.cover_image_path))
-        } for t in results
-    ]
-
-@router.get("/stream/{track_id}")
-async def stream_track(
-    track_id: int, 
-    request: Request, 
+@router.post("/scan", status_code=202)
+def scan_music_library(
+    directory: Optional[str] = None,
+    workers: Optional[int] = None,
+    full: bool = False,
+    files_per_sec: Optional[float] = None,
+    mb_per_sec: Optional[float] = None,
     db: Session = Depends(get_db)
 ):
-    file_path = library.get_track_file(db, track_id)
-    if not file_path or not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Track file not found")
+    # tarama arka planda job olarak koşar; aynı klasör için bekleyen job varsa o döner
+    directory = directory or settings.MUSIC_DIRECTORY
+    if not os.path.exists(directory):
+        raise HTTPException(status_code=404, detail="Directory not found")
+    job, _ = scan_jobs.create_job(db, directory, full, workers, files_per_sec, mb_per_sec)
+    return scan_jobs.job_dict(job)
+
+@router.get("/scan")
+def list_scan_jobs(limit: int = 20, db: Session = Depends(get_read_db)):
+    return [scan_jobs.job_dict(job) for job in scan_jobs.recent_jobs(db, max(1, min(limit, 100)))]
+
+@router.get("/scan/{job_id}")
+def get_scan_job(job_id: int, db: Session = Depends(get_read_db)):
+    job = scan_jobs.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return scan_jobs.job_dict(job)
+
+@router.delete("/scan/{job_id}")
+def cancel_scan_job(job_id: int, db: Session = Depends(get_db)):
+    job = scan_jobs.cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return scan_jobs.job_dict(job)
+
+def _not_modified(request: Request, response: Response, etag: str):
+    # sayaçlar sorgudan önce okunur: sorgu sırasında bir değişiklik olursa sonraki istek yeni ETag alır.
+    # 304 dönerse oturum hiç bağlantı açmaz
+    headers = {"etag": "W/" + etag, "cache-control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and streaming.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+@router.get("/search")
+async def search_tracks(request: Request, response: Response, q: str, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+    generation = versions.library_generation
+    # ETag sorguya ve limite özel; anahtar indeksin hazır olup olmadığını da içerir
+    # (indeks hazır olunca aynı sorgu fuzzy sonuçlar da döndürür)
+    key = library.search_cache_key(q, limit)
+    not_modified = _not_modified(request, response, versions.etag("s", generation, hashlib.sha1(repr(key).encode()).hexdigest()[:12]))
+    if not_modified:
+        return not_modified
+
+    cached = library.search_cache.get(key, generation)
+    if cached is not None:
+        return cached
+
+    results = await library.search_async(db, q, limit)
+    payload = [queries.search_row(row) for row in results]
+    library.search_cache.put(key, generation, payload)
+    return payload
+
+def _stream_page(stmt, cursor_fn, item_fn, limit: int):
+    # büyük sayfalar tek listede birikmeden parça parça JSON olarak akar
+    async def generate():
+        async with AsyncSessionLocal() as db:
+            buffer = ['{"items":[']
+            size = 0
+            count = 0
+            last = None
+            has_more = False
+            async for row in await db.stream(stmt):
+                if count == limit:
+                    has_more = True
+                    break
+                chunk = ("," if count else "") + json.dumps(item_fn(row))
+                buffer.append(chunk)
+                size += len(chunk)
+                count += 1
+                last = row
+                if size >= 32 * 1024:
+                    yield "".join(buffer)
+                    buffer = []
+                    size = 0
+            next_cursor = browse.encode_cursor(cursor_fn(last)) if has_more else None
+            buffer.append('],"next_cursor":' + json.dumps(next_cursor) + '}')
+            yield "".join(buffer)
+
+    return StreamingResponse(generate(), media_type="application/json")
+
+def _page_args(sort: Optional[str], sorts, limit: int):
+    if sort is not None and sort not in sorts:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(sorts)}")
+    return max(1, min(limit, browse.MAX_PAGE_SIZE))
+
+@router.get("/tracks")
+async def browse_tracks(sort: str = "title", cursor: Optional[str] = None, limit: int = 100):
+    limit = _page_args(sort, browse.TRACK_SORTS, limit)
+    try:
+        stmt, cursor_fn = browse.tracks(sort, cursor, limit)
+    except browse.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _stream_page(stmt, cursor_fn, browse.track_item, limit)
+
+@router.get("/albums")
+async def browse_albums(sort: str = "title", cursor: Optional[str] = None, limit: int = 100):
+    limit = _page_args(sort, browse.ALBUM_SORTS, limit)
+    try:
+        stmt, cursor_fn = browse.albums(sort, cursor, limit)
+    except browse.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _stream_page(stmt, cursor_fn, browse.album_item, limit)
+
+@router.get("/artists")
+async def browse_artists(cursor: Optional[str] = None, limit: int = 100):
+    limit = _page_args(None, (), limit)
+    try:
+        stmt, cursor_fn = browse.artists(cursor, limit)
+    except browse.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _stream_page(stmt, cursor_fn, browse.artist_item, limit)
+
+@router.get("/albums/{album_id}/tracks")
+async def browse_album_tracks(album_id: int, cursor: Optional[str] = None, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    if not await db.scalar(select(Album.id).where(Album.id == album_id)):
+        raise HTTPException(status_code=404, detail="Album not found")
+    limit = _page_args(None, (), limit)
+    try:
+        stmt, cursor_fn = browse.album_tracks(album_id, cursor, limit)
+    except browse.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _stream_page(stmt, cursor_fn, browse.album_track_item, limit)
+
+def _track_file(track_id: int):
+    db = ReadSessionLocal()
+    try:
+        return library.get_track_file(db, track_id)
+    finally:
+        db.close()
 
-    file_size = os.path.getsize(file_path)
-    range_header = request.headers.get("range")
+def _seek_target(track_id: int, t: float):
+    db = ReadSessionLocal()
+    try:
+        found = library.get_seek_index(db, track_id)
+    finally:
+        db.close()
+    if not found:
+        return None, None
+    file_path, method, points = found
+    if not points:
+        return file_path, None
+    try:
+        return file_path, seek.resolve(file_path, method, points, t)
+    except OSError:
+        return None, None
+    except seek.RESOLVE_ERRORS as e:
+        print(f"Seek failed for {file_path}: {e!r}")
+        return file_path, None
+
+@router.api_route("/stream/{track_id}", methods=["GET", "HEAD"])
+async def stream_track(track_id: int, request: Request, t: Optional[float] = None):
+    # oturum yayın boyunca açık kalmaz: uzun yayınlar bağlantı havuzunu tüketmesin
+    seek_to = None
+    if t is None:
+        file_path = await run_in_threadpool(_track_file, track_id)
+    else:
+        # ?t=saniye: yanıt o ana denk gelen frame'den başlar (tek istekle seek)
+        file_path, seek_to = await run_in_threadpool(_seek_target, track_id, t)
+        if file_path and not seek_to:
+            raise HTTPException(status_code=400, detail="Seeking by time is not supported for this file")
+    stat_result = streaming.open_stat(file_path) if file_path else None
+    if not stat_result:
+        raise HTTPException(status_code=404, detail="Track file not found")
 
     content_type, _ = mimetypes.guess_type(file_path)
     if not content_type:
         content_type = "application/octet-stream"
-    if not range_header:
-        def iterfile():  
-            with open(file_path, mode="rb") as file_like:  
-                yield from file_like  
-        return StreamingResponse(iterfile(), media_type=content_type)
 
-    try:
-        start, end = range_header.replace("bytes=", "").split("-")
-        start = int(start)
-        end = int(end) if end else file_size - 1
-    except ValueError:
-        start = 0
-        end = file_size - 1
-
-    chunk_size = 1024 * 1024
-    
-    def iterfile_range():
-        with open(file_path, "rb") as f:
-            f.seek(start)
-            bytes_to_read = end - start + 1
-            while bytes_to_read > 0:
-                chunk = f.read(min(chunk_size, bytes_to_read))
-                if not chunk:
-                    break
-                yield chunk
-                bytes_to_read -= len(chunk)
+    return streaming.AudioFileResponse(file_path, stat_result, content_type, seek_to=seek_to)
 
-    headers = {
-        "Content-Range": f"bytes {start}-{end}/{file_size}",
-        "Accept-Ranges": "bytes",
-        "Content-Length": str(end - start + 1),
+@router.get("/seekmap/{track_id}")
+def get_seek_map(track_id: int, t: Optional[float] = None, db: Session = Depends(get_read_db)):
+    found = library.get_seek_index(db, track_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Track not found")
+    file_path, method, points = found
+    if not points:
+        raise HTTPException(status_code=404, detail="Seek index not available")
+
+    if t is not None:
+        try:
+            seconds, offset = seek.resolve(file_path, method, points, t)
+        except OSError:
+            raise HTTPException(status_code=404, detail="Track file not found")
+        except seek.RESOLVE_ERRORS as e:
+            print(f"Seek failed for {file_path}: {e!r}")
+            raise HTTPException(status_code=404, detail="Seek index not available")
+        return {"track_id": track_id, "time": round(seconds, 3), "offset": offset}
+    return {
+        "track_id": track_id,
+        "method": method,
+        # exact değilse noktalar tahmini; ?t= ile frame'e hizalanmış offset alınır
+        "exact": method in seek.EXACT_METHODS,
+        "points": [[round(seconds, 3), offset] for seconds, offset in points],
     }
 
-    return StreamingResponse(
-        iterfile_range(), 
-        status_code=206, 
-        headers=headers, 
-        media_type=content_type
-    )
+def _cover_response(request: Request, cover_hash: str, size: Optional[int]):
+    if size is not None and size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    if size:
+        return thumbnails.response(request, cover_hash, size)
+    return covers.response(request, cover_hash)
 
 @router.get("/cover/{album_id}")
-def get_album_cover(album_id: int, db: Session = Depends(get_db)):
-    cover_path = library.get_album_cover_path(db, album_id)
-    if cover_path and os.path.exists(cover_path):
-        return FileResponse(
-            cover_path,
-            headers={"Cache-Control": "public, max-age=604800"}  # 1 week cache
-        )
-    
+def get_album_cover(album_id: int, request: Request, size: Optional[int] = None, db: Session = Depends(get_read_db)):
+    cover_hash = library.get_album_cover_hash(db, album_id)
+    if cover_hash:
+        return _cover_response(request, cover_hash, size)
+
     raise HTTPException(status_code=404, detail="Cover art not found")
 
 @router.get("/track-cover/{track_id}")
-def get_track_embedded_cover(track_id: int, db: Session = Depends(get_db)):
-    from mutagen import File as MutagenFile
-    from mutagen.flac import FLAC
-    from mutagen.mp3 import MP3
-    from mutagen.id3 import ID3
-    from io import BytesIO
-    from fastapi.responses import Response
-    
-    file_path = library.get_track_file(db, track_id)
-    if not file_path or not os.path.exists(file_path):
+def get_track_embedded_cover(track_id: int, request: Request, size: Optional[int] = None, db: Session = Depends(get_read_db)):
+    cover_hash = library.get_track_cover_hash(db, track_id)
+    if cover_hash is None:
         raise HTTPException(status_code=404, detail="Track not found")
-    
-    try:
-        audio = MutagenFile(file_path)
-        cover_data = None
-        mime_type = "image/jpeg"
-        
-        if file_path.lower().endswith('.flac'):
-            flac = FLAC(file_path)
-            if flac.pictures:
-                cover_data = flac.pictures[0].data
-                mime_type = flac.pictures[0].mime
-        elif file_path.lower().endswith('.mp3'):
-            try:
-                tags = ID3(file_path)
-                for key in tags.keys():
-                    if key.startswith('APIC'):
-                        cover_data = tags[key].data
-                        mime_type = tags[key].mime
-                        break
-            except:
-                pass
-        
-        if cover_data:
-            return Response(
-                content=cover_data, 
-                media_type=mime_type,
-                headers={"Cache-Control": "public, max-age=604800"}  # 1 week cache
-            )
-    except Exception as e:
-        pass
-    
+    if cover_hash:
+        return _cover_response(request, cover_hash, size)
+
     raise HTTPException(status_code=404, detail="No embedded cover art")
 
 
 @router.get("/favorites")
-def get_favorites(db: Session = Depends(get_db)):
-    from app.models.music import Favorite, Track, Artist, Album
-    
-    favorites = db.query(Favorite).order_by(Favorite.added_at.desc()).all()
-    result = []
-    for fav in favorites:
-        track = fav.track
-        if track:
-            album = track.album
-            artist = track.artist
-            result.append({
-                "id": track.id,
-                "title": track.title,
-                "artist": artist.name if artist else "Bilinmeyen",
-                "album_id": album.id if album else None,
-                "album_title": album.title if album else None,
-                "duration": track.duration,
-                "has_cover": album.cover_image_path is not None if album else False,
-                "added_at": fav.added_at.isoformat() if fav.added_at else None
-            })
-    return result
+async def get_favorites(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = _not_modified(request, response, versions.etag("f", versions.library_generation, versions.favorites_version))
+    if not_modified:
+        return not_modified
+    return [queries.favorite_row(row) for row in await db.execute(queries.favorites())]
 
 
 @router.post("/favorites/{track_id}")
@@ -184,6 +275,7 @@ def add_favorite(track_id: int, db: Session = Depends(get_db)):
     favorite = Favorite(track_id=track_id, added_at=datetime.utcnow())
     db.add(favorite)
     db.commit()
+    versions.bump_favorites()
     return {"message": "Added to favorites", "track_id": track_id}
 
 
@@ -197,23 +289,16 @@ def remove_favorite(track_id: int, db: Session = Depends(get_db)):
     
     db.delete(favorite)
     db.commit()
+    versions.bump_favorites()
     return {"message": "Removed from favorites", "track_id": track_id}
 
 
 @router.get("/playlists")
-def get_playlists(db: Session = Depends(get_db)):
-    from app.models.music import Playlist, PlaylistTrack
-    
-    playlists = db.query(Playlist).order_by(Playlist.created_at.desc()).all()
-    result = []
-    for pl in playlists:
-        result.append({
-            "id": pl.id,
-            "name": pl.name,
-            "track_count": len(pl.tracks),
-            "created_at": pl.created_at.isoformat() if pl.created_at else None
-        })
-    return result
+async def get_playlists(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = _not_modified(request, response, versions.etag("p", versions.playlists_version))
+    if not_modified:
+        return not_modified
+    return [queries.playlist_row(row) for row in await db.execute(queries.playlists())]
 
 
 @router.post("/playlists")
@@ -224,33 +309,25 @@ def create_playlist(name: str, db: Session = Depends(get_db)):
     playlist = Playlist(name=name, created_at=datetime.utcnow())
     db.add(playlist)
     db.commit()
+    versions.bump_playlist()
     db.refresh(playlist)
     return {"id": playlist.id, "name": playlist.name}
 
 
 @router.get("/playlists/{playlist_id}")
-def get_playlist(playlist_id: int, db: Session = Depends(get_db)):
-    from app.models.music import Playlist, PlaylistTrack, Track, Artist, Album
+async def get_playlist(request: Request, response: Response, playlist_id: int, db: AsyncSession = Depends(get_async_db)):
+    from app.models.music import Playlist
     
-    playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
+    etag = versions.etag("pl", playlist_id, versions.library_generation, versions.playlist_version(playlist_id))
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    playlist = await db.get(Playlist, playlist_id)
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
-    tracks = []
-    for pt in playlist.tracks:
-        track = pt.track
-        if track:
-            artist = track.artist
-            album = track.album
-            tracks.append({
-                "id": track.id,
-                "title": track.title,
-                "artist": artist.name if artist else "Bilinmeyen",
-                "album_id": album.id if album else None,
-                "duration": track.duration,
-                "has_cover": album.cover_image_path is not None if album else False,
-                "position": pt.position
-            })
+    tracks = [queries.playlist_track_row(row) for row in await db.execute(queries.playlist_tracks(playlist_id))]
     
     return {
         "id": playlist.id,
@@ -262,37 +339,41 @@ def get_playlist(playlist_id: int, db: Session = Depends(get_db)):
 
 @router.post("/playlists/{playlist_id}/tracks/{track_id}")
 def add_track_to_playlist(playlist_id: int, track_id: int, db: Session = Depends(get_db)):
-    from app.models.music import Playlist, PlaylistTrack, Track
-    from datetime import datetime
-    
-    playlist = db.query(Playlist).filter(Playlist.id == playlist_id).first()
-    if not playlist:
-        raise HTTPException(status_code=404, detail="Playlist not found")
-    
-    track = db.query(Track).filter(Track.id == track_id).first()
-    if not track:
-        raise HTTPException(status_code=404, detail="Track not found")
-    
-    existing = db.query(PlaylistTrack).filter(
-        PlaylistTrack.playlist_id == playlist_id,
-        PlaylistTrack.track_id == track_id
-    ).first()
-    if existing:
+    try:
+        added = playlists.append_track(db, playlist_id, track_id)
+    except playlists.NotFound as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    if not added:
         return {"message": "Track already in playlist"}
-    
-    max_pos = db.query(PlaylistTrack).filter(PlaylistTrack.playlist_id == playlist_id).count()
-    
-    pt = PlaylistTrack(
-        playlist_id=playlist_id,
-        track_id=track_id,
-        position=max_pos,
-        added_at=datetime.utcnow()
-    )
-    db.add(pt)
-    db.commit()
     return {"message": "Track added to playlist"}
 
 
+class PlaylistOperation(BaseModel):
+    op: Literal["add", "remove", "move"]
+    # add/remove
+    track_ids: Optional[List[int]] = None
+    # move
+    track_id: Optional[int] = None
+    # add: eklenecek yer (yoksa sona), move: hedef sıra; ikisi de 0 tabanlı
+    index: Optional[int] = None
+
+class PlaylistOperations(BaseModel):
+    operations: List[PlaylistOperation]
+
+@router.post("/playlists/{playlist_id}/tracks")
+def edit_playlist_tracks(playlist_id: int, request: PlaylistOperations, db: Session = Depends(get_db)):
+    # toplu ekleme / çıkarma / taşıma: hepsi tek transaction, biri hata verirse hiçbiri uygulanmaz
+    for operation in request.operations:
+        if operation.op == "move" and (operation.track_id is None or operation.index is None):
+            raise HTTPException(status_code=400, detail="move requires track_id and index")
+        if operation.op != "move" and not operation.track_ids:
+            raise HTTPException(status_code=400, detail=f"{operation.op} requires track_ids")
+    try:
+        return playlists.apply_operations(db, playlist_id, [operation.model_dump() for operation in request.operations])
+    except playlists.NotFound as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+
 @router.delete("/playlists/{playlist_id}/tracks/{track_id}")
 def remove_track_from_playlist(playlist_id: int, track_id: int, db: Session = Depends(get_db)):
     from app.models.music import PlaylistTrack
@@ -306,6 +387,7 @@ def remove_track_from_playlist(playlist_id: int, track_id: int, db: Session = De
     
     db.delete(pt)
     db.commit()
+    versions.bump_playlist(playlist_id)
     return {"message": "Track removed from playlist"}
 
 
@@ -319,57 +401,66 @@ def delete_playlist(playlist_id: int, db: Session = Depends(get_db)):
     
     db.delete(playlist)
     db.commit()
+    versions.bump_playlist(playlist_id)
     return {"message": "Playlist deleted"}
 
 
 @router.get("/lyrics")
-def get_lyrics(
+async def get_lyrics(
     artist_name: str, 
     track_name: str, 
     album_name: Optional[str] = None, 
     duration: Optional[float] = None
 ):
-    import requests
-    
-    url = "https://lrclib.net/api/get"
-    params = {
-        "artist_name": artist_name,
-        "track_name": track_name,
-    }
-    if album_name:
-        params["album_name"] = album_name
-    if duration:
-        params["duration"] = duration
-        
-    headers = {
-        "User-Agent": "TsukuyomiMusicPlayer/1.0 (https://github.com/ewgsta/tsukuyomi)"
-    }
-        
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 404:
-            raise HTTPException(status_code=404, detail="Lyrics not found")
-        else:
-            # Try search if direct get fails
-            search_url = "https://lrclib.net/api/search"
-            # Remove duration for search as it might be too strict
-            search_params = params.copy()
-            if "duration" in search_params:
-                del search_params["duration"]
-            
-            search_res = requests.get(search_url, params=search_params, headers=headers, timeout=10)
-            if search_res.status_code == 200:
-                data = search_res.json()
-                if data and len(data) > 0:
-                    return data[0]
-            
-            raise HTTPException(status_code=404, detail="Lyrics not found")
-    except HTTPException as he:
-        raise he
-    except Exception as e:
+        data = await lyrics.get_lyrics(artist_name, track_name, album_name, duration)
+    except lyrics.LyricsUnavailable as e:
         print(f"Lyrics fetch error: {e}")
-        # Return 404 instead of 500 when lyrics are just missing or connection fails, 
-        # so the UI doesn't look broken.
+        # bağlantı sorunu da 404, arayüz bozuk görünmesin
         raise HTTPException(status_code=404, detail="Lyrics unavailable")
+    if data is None:
+        raise HTTPException(status_code=404, detail="Lyrics not found")
+    return data
+
+
+class LyricsPrefetchRequest(BaseModel):
+    source: Literal["playlist", "favorites", "queue"]
+    playlist_id: Optional[int] = None
+    # queue: çalma kuyruğunda sıradaki track id'leri, ilk `limit` tanesi ön yüklenir
+    track_ids: Optional[List[int]] = None
+    limit: Optional[int] = None
+
+@router.post("/lyrics/prefetch")
+def prefetch_lyrics(request: LyricsPrefetchRequest, db: Session = Depends(get_db)):
+    from app.models.music import Playlist
+
+    if request.source == "playlist":
+        if request.playlist_id is None or not db.query(Playlist.id).filter(Playlist.id == request.playlist_id).first():
+            raise HTTPException(status_code=404, detail="Playlist not found")
+        source = f"playlist:{request.playlist_id}"
+    elif request.source == "queue":
+        if not request.track_ids:
+            raise HTTPException(status_code=400, detail="track_ids required for queue prefetch")
+        source = "queue"
+    else:
+        source = "favorites"
+
+    track_ids = prefetch.resolve_tracks(db, request.source, request.playlist_id, request.track_ids, request.limit)
+    job, created = prefetch.create_job(db, source, track_ids)
+    if created:
+        prefetch.submit(job.id)
+    return prefetch.job_dict(job)
+
+@router.get("/lyrics/prefetch/{job_id}")
+def get_prefetch_job(job_id: int, db: Session = Depends(get_read_db)):
+    job = prefetch.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Prefetch job not found")
+    return prefetch.job_dict(job)
+
+@router.delete("/lyrics/prefetch/{job_id}")
+def cancel_prefetch_job(job_id: int, db: Session = Depends(get_db)):
+    job = prefetch.cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Prefetch job not found")
+    return prefetch.job_dict(job)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.core.config import settings
-from app.services import scanner
+from app.services import scan_jobs
 from app.db.session import SessionLocal
+from starlette.concurrency import run_in_threadpool
 import os
 
 router = APIRouter()
@@ -21,6 +22,14 @@ async def get_settings():
         project_name=settings.PROJECT_NAME
     )
 
+def _queue_scan(directory: str):
+    db = SessionLocal()
+    try:
+        job, _ = scan_jobs.create_job(db, directory)
+        return scan_jobs.job_dict(job)
+    finally:
+        db.close()
+
 @router.put("/")
 async def update_settings(update: SettingsUpdate):
     if update.music_directory:
@@ -29,12 +38,8 @@ async def update_settings(update: SettingsUpdate):
         
         settings.MUSIC_DIRECTORY = update.music_directory
         
-        # Rescan with new directory
-        db = SessionLocal()
-        try:
-            result = scanner.scan_library(db, update.music_directory)
-            return {"status": "success", "music_directory": update.music_directory, "scan_result": result}
-        finally:
-            db.close()
+        # Rescan with new directory (arka planda job, durum /music/scan/{id})
+        job = await run_in_threadpool(_queue_scan, update.music_directory)
+        return {"status": "success", "music_directory": update.music_directory, "scan_job": job}
     
     return {"status": "success"}
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.api.endpoints import health, music, settings
+from app.api.endpoints import health, music, settings, debug
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(music.router, prefix="/music", tags=["music"])
 api_router.include_router(settings.router, prefix="/settings", tags=["settings"])
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
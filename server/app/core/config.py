@@ -11,6 +11,90 @@ class Settings(BaseSettings):
     
     SQLALCHEMY_DATABASE_URI: str = "sqlite:///./tsukuyomi.db"
 
+    # sqlite profili: WAL'de okuyucular yazıcıyı beklemez. tek (sıralı) yazıcı bağlantısı,
+    # okumalar ayrı, salt okunur bir havuzdan. cache_size KiB, mmap_size byte cinsinden
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_READ_POOL_SIZE: int = 8
+    DB_WRITE_TIMEOUT: float = 30.0
+
+    # taramada çıkarılan kapakların saklandığı klasör (içerik hash'i ile adlandırılır)
+    COVER_CACHE_DIRECTORY: str = "./covers"
+    # kapak küçük resimleri: üretilen boyutlar (px), kalite ve arka plan thread sayısı
+    COVER_THUMBNAIL_SIZES: list[int] = [64, 256, 512, 1024]
+    COVER_THUMBNAIL_QUALITY: int = 82
+    COVER_THUMBNAIL_WORKERS: int = 2
+
+    # tarama: 0 = cpu sayısı kadar process, 1 = paralel yok
+    SCAN_WORKERS: int = 0
+    SCAN_CHUNK_SIZE: int = 64
+    # toplu yazma: her N satırda ya da T saniyede bir commit
+    SCAN_BATCH_SIZE: int = 500
+    SCAN_COMMIT_INTERVAL: float = 2.0
+    # açılışta mevcut db ile hemen hizmet verilir, uzlaştırma taraması arka planda koşar
+    STARTUP_SCAN: bool = True
+    # tarama job'ları: okuma bütçesi (0 = sınırsız) ve ilerlemenin db'ye yazılma aralığı.
+    # yarıda kalan job yeniden açılışta devam eder, işlenmiş dosyalar parmak iziyle atlanır
+    SCAN_MAX_FILES_PER_SEC: float = 0
+    SCAN_MAX_MB_PER_SEC: float = 0
+    SCAN_CHECKPOINT_SECONDS: float = 5.0
+
+    # watcher: dosya bu kadar saniye değişmeden durunca işlenir
+    WATCH_SETTLE_SECONDS: float = 2.0
+    WATCH_BATCH_SIZE: int = 200
+
+    # /metrics (prometheus) ve istek başına süre / sorgu sayısı ölçümü
+    METRICS_ENABLED: bool = True
+
+    # istek profili: varsayılan kapalı. X-Profile-Token başlığı PROFILE_TOKEN ile eşleşen istekler
+    # ve PROFILE_SAMPLE_RATE oranında rastgele seçilen istekler profillenir; sonuçlar /api/v1/debug altında.
+    # token verilmezse örnekleme de kapalı (sonuçları okuyacak yol yok)
+    PROFILE_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HISTORY: int = 50
+    PROFILE_TOP_FUNCTIONS: int = 40
+
+    # bu süreyi (ms) aşan sql'ler rotasıyla birlikte loglanır (0 = kapalı)
+    SLOW_QUERY_MS: float = 0
+    SLOW_QUERY_HISTORY: int = 200
+
+    # "fuzzy": ILIKE + bellek indeksi, "fts": sqlite FTS5 (bm25 sıralı, önek eşleşme)
+    SEARCH_ENGINE: str = "fuzzy"
+
+    # arama indeksi: sorgu kelimesi başına en fazla terim / fuzzy'ye giden aday sayısı
+    SEARCH_MAX_TERMS: int = 64
+    SEARCH_MAX_CANDIDATES: int = 5000
+
+    # /search sonuç cache'i (LRU, kayıt ve byte sınırlı)
+    SEARCH_CACHE_ENTRIES: int = 2048
+    SEARCH_CACHE_BYTES: int = 32 * 1024 * 1024
+
+    # seek indeksi: frame taramasında kaç saniyede bir nokta saklanır
+    SEEK_INDEX_INTERVAL: float = 1.0
+
+    # stream: parça boyutu, aynı anda en fazla kaç disk okuması,
+    # bağlantı başına hız sınırı (byte/s, 0 = sınırsız) ve beklemeden gidecek ilk byte'lar
+    STREAM_CHUNK_SIZE: int = 256 * 1024
+    STREAM_MAX_CONCURRENT_READS: int = 16
+    STREAM_RATE_LIMIT: int = 0
+    STREAM_RATE_BURST: int = 4 * 1024 * 1024
+
+    # şarkı sözleri: lrclib adresi (testte yerel sunucu verilebilir), bulunan / bulunamayan
+    # sonuçların cache süresi (saniye), istek zaman aşımı ve havuzdaki bağlantı sayısı
+    LYRICS_API_URL: str = "https://lrclib.net/api"
+    LYRICS_TTL_SECONDS: int = 30 * 24 * 3600
+    LYRICS_MISS_TTL_SECONDS: int = 24 * 3600
+    LYRICS_TIMEOUT: float = 10.0
+    LYRICS_MAX_CONNECTIONS: int = 10
+    # arka plan söz ön yüklemesi: lrclib'e saniyede en fazla kaç istek, çalma kuyruğunda
+    # kaç şarkı ileriye bakılır, ilerleme kaç şarkıda bir kaydedilir
+    LYRICS_PREFETCH_RATE: float = 2.0
+    LYRICS_PREFETCH_QUEUE_AHEAD: int = 10
+    LYRICS_PREFETCH_CHECKPOINT: int = 10
+
     class Config:
         env_file = ".env"
 
@@ -1,19 +1,124 @@
-
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
 
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URI, 
-    connect_args={"check_same_thread": False} 
-)
+IS_SQLITE = settings.SQLALCHEMY_DATABASE_URI.startswith("sqlite")
+
+def _sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if settings.SQLITE_WAL and not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # negatif değer KiB demek
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+def _create_engine(read_only: bool):
+    if not IS_SQLITE:
+        return create_engine(settings.SQLALCHEMY_DATABASE_URI)
+
+    connect_args = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    if read_only:
+        new_engine = create_engine(
+            settings.SQLALCHEMY_DATABASE_URI,
+            connect_args=connect_args,
+            pool_size=settings.DB_READ_POOL_SIZE,
+            max_overflow=settings.DB_READ_POOL_SIZE
+        )
+    else:
+        # sqlite zaten tek yazıcıya izin veriyor; tek bağlantı ile yazarlar
+        # "database is locked" yerine havuzda sırayla bekler
+        new_engine = create_engine(
+            settings.SQLALCHEMY_DATABASE_URI,
+            connect_args=connect_args,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.DB_WRITE_TIMEOUT
+        )
+    event.listen(new_engine, "connect", _sqlite_pragmas(read_only))
+    return new_engine
+
+engine = _create_engine(read_only=False)
+read_engine = _create_engine(read_only=True) if IS_SQLITE else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def _create_async_engine():
+    # sık okunan endpoint'ler için: threadpool yerine event loop'ta bekler
+    if not IS_SQLITE:
+        return create_async_engine(settings.SQLALCHEMY_DATABASE_URI)
+    new_engine = create_async_engine(
+        settings.SQLALCHEMY_DATABASE_URI.replace("sqlite://", "sqlite+aiosqlite://", 1),
+        connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=settings.DB_READ_POOL_SIZE,
+        max_overflow=settings.DB_READ_POOL_SIZE
+    )
+    event.listen(new_engine.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+    return new_engine
+
+async_engine = _create_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+# init_db bir kolonu sonradan eklediğinde eski satırları doldurmak için
+# sqlite'ta DateTime metin olarak tutuluyor ve keyset cursor'ı metin olarak karşılaştırılıyor:
+# doldurulan değer sqlalchemy'nin yazdığı biçimde olmalı ('YYYY-MM-DD HH:MM:SS.ffffff')
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'" if IS_SQLITE else "CURRENT_TIMESTAMP"
+
+_BACKFILLS = {
+    ("albums", "has_cover"): "UPDATE albums SET has_cover = (cover_image_path IS NOT NULL)",
+    ("tracks", "added_at"): f"UPDATE tracks SET added_at = {_NOW}",
+}
+
+# eski backfill CURRENT_TIMESTAMP yazıyordu (kesirsiz); bu satırlarda sayfalama ilerlemiyordu
+_REPAIRS = [
+    "UPDATE tracks SET added_at = added_at || '.000000' WHERE length(added_at) = 19",
+] if IS_SQLITE else []
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
+
+    # create_all var olan tablolara yeni kolon eklemiyor, eski db'ler için elle ekle
+    with engine.begin() as conn:
+        # yazıcı havuzunda tek bağlantı var, inspector aynı bağlantıdan okumalı
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    backfill = _BACKFILLS.get((table.name, column.name))
+                    if backfill:
+                        conn.execute(text(backfill))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        for repair in _REPAIRS:
+            conn.execute(text(repair))
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,25 +1,30 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
 from app.api.router import api_router
-from app.services import watcher, scanner
-from app.db.session import engine, Base, SessionLocal
+from app.services import watcher, fts, thumbnails, lyrics, prefetch, startup, metrics, profiler
+from app.db.session import init_db, engine, read_engine, async_engine
+from app.core.config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    
-    print("initial scan...")
-    db = SessionLocal()
-    try:
-        scanner.scan_library(db)
-    finally:
-        db.close()
-    
+    init_db()
+    if settings.SEARCH_ENGINE == "fts":
+        fts.ensure_fts(engine)
+
+    # tarama arka planda; watcher en baştan açık ki tarama sırasındaki değişiklikler kaçmasın
     watcher.start_watcher()
+    startup.start()
+    prefetch.start()
     
     yield
     
+    startup.stop()
     watcher.stop_watcher()
+    thumbnails.shutdown()
+    await prefetch.stop()
+    await lyrics.close()
+    await async_engine.dispose()
 
 app = FastAPI(title="tsukuyomi", lifespan=lifespan)
 
@@ -32,8 +37,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(profiler.ProfilerMiddleware)
+
+for db_engine in {engine, read_engine, async_engine.sync_engine}:
+    metrics.instrument_engine(db_engine)
+    profiler.instrument_engine(db_engine)
+
 app.include_router(api_router, prefix="/api/v1")
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 async def root():
     return {"message": "aptal çocuk.. burada ne arıyorsun ki? kaybolan yıllarını mı.. bende bulamadım umarım sen bulursun. ha ama eğer dökümantasyona göz atmak istersen /docs bakabilirsin!"}
@@ -1,6 +1,6 @@
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, DateTime, Boolean, Index, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.db.session import Base
 
@@ -20,11 +20,19 @@ class Album(Base):
     title = Column(String, index=True)
     year = Column(String, nullable=True)
     cover_image_path = Column(String, nullable=True) 
+    has_cover = Column(Boolean, default=False)
+    cover_hash = Column(String, nullable=True)
     artist_id = Column(Integer, ForeignKey("artists.id"))
     
     artist = relationship("Artist", back_populates="albums")
     tracks = relationship("Track", back_populates="album")
 
+    # keyset sayfalama için sıralama anahtarları
+    __table_args__ = (
+        Index("ix_albums_title_id", "title", "id"),
+        Index("ix_albums_artist_title_id", "artist_id", "title", "id"),
+    )
+
 class Track(Base):
     __tablename__ = "tracks"
 
@@ -35,6 +43,20 @@ class Track(Base):
     track_number = Column(Integer, nullable=True)
     disc_number = Column(Integer, nullable=True)
     genre = Column(String, nullable=True)
+
+    # yeniden taramada değişmeyen dosyaları atlamak için parmak izi
+    file_size = Column(Integer, nullable=True)
+    file_mtime = Column(Float, nullable=True)
+    file_inode = Column(Integer, nullable=True)
+    added_at = Column(DateTime, default=datetime.utcnow)
+    # dosyanın en son okunduğu an; yarıda kalan tam tarama buradan devam eder
+    scanned_at = Column(DateTime, nullable=True)
+    # kapak deposundaki gömülü kapak; None = bakılmadı, "" = yok
+    cover_hash = Column(String, nullable=True)
+    # zaman -> byte offset indeksi (seek.encode); None = çıkarılmadı, "" yöntem = desteklenmiyor.
+    # blob liste sorgularında yüklenmesin diye deferred
+    seek_method = Column(String, nullable=True)
+    seek_index = deferred(Column(LargeBinary, nullable=True))
     
     album_id = Column(Integer, ForeignKey("albums.id"))
     artist_id = Column(Integer, ForeignKey("artists.id"))
@@ -42,6 +64,14 @@ class Track(Base):
     album = relationship("Album", back_populates="tracks")
     artist = relationship("Artist", back_populates="tracks")
 
+    # keyset sayfalama için sıralama anahtarları
+    __table_args__ = (
+        Index("ix_tracks_title_id", "title", "id"),
+        Index("ix_tracks_added_at_id", "added_at", "id"),
+        Index("ix_tracks_artist_title_id", "artist_id", "title", "id"),
+        Index("ix_tracks_album_order", "album_id", "disc_number", "track_number", "id"),
+    )
+
 class Favorite(Base):
     __tablename__ = "favorites"
 
@@ -58,7 +88,7 @@ class Playlist(Base):
     name = Column(String, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    tracks = relationship("PlaylistTrack", back_populates="playlist", order_by="PlaylistTrack.position")
+    tracks = relationship("PlaylistTrack", back_populates="playlist", order_by="(PlaylistTrack.position, PlaylistTrack.id)")
 
 class PlaylistTrack(Base):
     __tablename__ = "playlist_tracks"
@@ -71,3 +101,62 @@ class PlaylistTrack(Base):
     
     playlist = relationship("Playlist", back_populates="tracks")
     track = relationship("Track")
+
+    __table_args__ = (
+        # pozisyonlar seyrek (services/playlists.py); sıralı okuma ve komşu bulma bu indeksle
+        Index("ix_playlist_tracks_order", "playlist_id", "position"),
+    )
+
+class LyricsCache(Base):
+    __tablename__ = "lyrics_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # normalize edilmiş sanatçı / şarkı / albüm / süre
+    key = Column(String, unique=True, index=True)
+    # lrclib yanıtı (json); bulunamadıysa NULL (negatif cache)
+    payload = Column(Text, nullable=True)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+class LyricsPrefetchJob(Base):
+    __tablename__ = "lyrics_prefetch_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String)
+    # sıralı track id listesi (json); position'a kadarı işlendi
+    track_ids = Column(Text)
+    position = Column(Integer, default=0)
+    status = Column(String, default="queued", index=True)
+    fetched = Column(Integer, default=0)
+    cached = Column(Integer, default=0)
+    missing = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ScanJob(Base):
+    __tablename__ = "scan_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    directory = Column(String)
+    full = Column(Boolean, default=False)
+    workers = Column(Integer, nullable=True)
+    # okuma bütçesi; None = ayarlardaki varsayılan
+    files_per_sec = Column(Float, nullable=True)
+    mb_per_sec = Column(Float, nullable=True)
+    status = Column(String, default="queued", index=True)
+    phase = Column(String, default="pending")
+    files_seen = Column(Integer, default=0)
+    files_queued = Column(Integer, default=0)
+    files_parsed = Column(Integer, default=0)
+    files_failed = Column(Integer, default=0)
+    # yeniden başlatılan job'da önceki turların toplamı
+    added = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    removed = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    # ilk denemenin başladığı an: devam eden job bundan sonra okunmuş dosyaları tekrar okumaz
+    started_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import select, tuple_, func
+from app.models.music import Track, Artist, Album
+from app.services import queries
+
+# keyset (cursor) sayfalama: cursor son satırın sıralama anahtarlarıdır,
+# sonraki sayfa "WHERE (k1, k2, id) > cursor" ile indeksten devam eder.
+# böylece 500. sayfa da 1. sayfa kadar ucuz.
+
+MAX_PAGE_SIZE = 500
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_keys):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(sort_keys):
+            raise ValueError
+        return [datetime.fromisoformat(v) if key == "added_at" else v for key, v in zip(sort_keys, values)]
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+def _page(stmt, keys, sort_keys, cursor, limit, descending=False):
+    if cursor:
+        values = decode_cursor(cursor, sort_keys)
+        stmt = stmt.where(tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values))
+    order = [k.desc() for k in keys] if descending else list(keys)
+    # bir fazlası: sonraki sayfa var mı?
+    return stmt.order_by(*order).limit(limit + 1)
+
+# sort adı -> (sıralama kolonları, satırdan cursor değerleri, cursor alan adları, azalan mı)
+TRACK_SORTS = {
+    "title": ((Track.title, Track.id), lambda r: [r.title, r.id], ("title", "id"), False),
+    "artist": ((Artist.name, Track.title, Track.id), lambda r: [r.artist, r.title, r.id], ("artist", "title", "id"), False),
+    "added": ((Track.added_at, Track.id), lambda r: [r.added_at, r.id], ("added_at", "id"), True),
+}
+
+ALBUM_SORTS = {
+    "title": ((Album.title, Album.id), lambda r: [r.title, r.id], ("title", "id"), False),
+    "artist": ((Artist.name, Album.title, Album.id), lambda r: [r.artist, r.title, r.id], ("artist", "title", "id"), False),
+}
+
+def tracks(sort: str, cursor: str, limit: int):
+    keys, cursor_fn, sort_keys, descending = TRACK_SORTS[sort]
+    stmt = queries.track_select(Track.added_at)
+    if sort == "artist":
+        stmt = stmt.where(Artist.id.is_not(None))
+    return _page(stmt, keys, sort_keys, cursor, limit, descending), cursor_fn
+
+def albums(sort: str, cursor: str, limit: int):
+    keys, cursor_fn, sort_keys, descending = ALBUM_SORTS[sort]
+    stmt = select(
+        Album.id,
+        Album.title,
+        Album.year,
+        Album.has_cover,
+        Artist.id.label("artist_id"),
+        Artist.name.label("artist"),
+    ).select_from(Album).join(Artist, Album.artist_id == Artist.id)
+    return _page(stmt, keys, sort_keys, cursor, limit, descending), cursor_fn
+
+def artists(cursor: str, limit: int):
+    stmt = select(Artist.id, Artist.name)
+    return _page(stmt, (Artist.name, Artist.id), ("name", "id"), cursor, limit), lambda r: [r.name, r.id]
+
+def album_tracks(album_id: int, cursor: str, limit: int):
+    keys = (func.coalesce(Track.disc_number, 0), func.coalesce(Track.track_number, 0), Track.id)
+    stmt = queries.track_select(Track.track_number, Track.disc_number).where(Track.album_id == album_id)
+    cursor_fn = lambda r: [r.disc_number or 0, r.track_number or 0, r.id]
+    return _page(stmt, keys, ("disc", "track", "id"), cursor, limit), cursor_fn
+
+def track_item(row):
+    item = queries.search_row(row)
+    item["added_at"] = row.added_at.isoformat() if row.added_at else None
+    return item
+
+def album_track_item(row):
+    item = queries.search_row(row)
+    item["track_number"] = row.track_number
+    item["disc_number"] = row.disc_number
+    return item
+
+def album_item(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "year": row.year,
+        "artist": row.artist,
+        "artist_id": row.artist_id,
+        "has_cover": bool(row.has_cover)
+    }
+
+def artist_item(row):
+    return {"id": row.id, "name": row.name}
@@ -0,0 +1,125 @@
+import os
+import base64
+import hashlib
+import tempfile
+import mutagen
+from mutagen.flac import Picture
+from starlette.responses import Response, FileResponse
+from app.core.config import settings
+from app.services.streaming import etag_matches
+
+# içerik adresli kapak deposu: dosya adı görselin sha1'i, aynı kapak bir kez saklanır.
+# track/album satırında cover_hash: None = henüz bakılmadı, "" = kapak yok
+
+_MEDIA_TYPES = (
+    (b"\xff\xd8", "image/jpeg"),
+    (b"\x89PNG", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+def path_for(cover_hash: str):
+    return os.path.join(settings.COVER_CACHE_DIRECTORY, cover_hash[:2], cover_hash)
+
+def exists(cover_hash: str):
+    return bool(cover_hash) and os.path.exists(path_for(cover_hash))
+
+def store(data: bytes):
+    cover_hash = hashlib.sha1(data).hexdigest()
+    path = path_for(cover_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # scan worker'ları, watcher ve istek thread'leri aynı kapağı aynı anda yazabilir:
+        # her yazan kendi geçici dosyasına, sonra atomik rename
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            # aynı içerik başka bir yazandan geldiyse (windows'ta replace açık dosyada başarısız olur) sorun yok
+            if not os.path.exists(path):
+                raise
+    return cover_hash
+
+def import_file(image_path: str):
+    try:
+        with open(image_path, "rb") as f:
+            return store(f.read())
+    except OSError as e:
+        print(f"Failed to import cover {image_path}: {e}")
+        return None
+
+def _pick(pictures):
+    # ön kapak (type 3) varsa o, yoksa ilk resim
+    for picture in pictures:
+        if getattr(picture, "type", None) == 3:
+            return picture.data
+    return pictures[0].data if pictures else None
+
+def read_embedded(file_path: str, audio=None):
+    # audio: taramada zaten ayrıştırılmış mutagen nesnesi (easy olmayan); yoksa dosya açılır
+    if audio is None:
+        audio = mutagen.File(file_path)
+    if audio is None:
+        return None
+
+    pictures = getattr(audio, "pictures", None)
+    if pictures:
+        return _pick(pictures)
+
+    tags = audio.tags
+    if not tags:
+        return None
+    if hasattr(tags, "getall"):
+        return _pick(tags.getall("APIC"))
+    if "covr" in tags:
+        covers = tags["covr"]
+        return bytes(covers[0]) if covers else None
+    if "metadata_block_picture" in tags:
+        pictures = []
+        for value in tags["metadata_block_picture"]:
+            try:
+                pictures.append(Picture(base64.b64decode(value)))
+            except Exception:
+                continue
+        return _pick(pictures)
+    return None
+
+def extract(file_path: str, audio=None):
+    # gömülü kapağı depoya al; kapak yoksa ya da okunamıyorsa ""
+    try:
+        data = read_embedded(file_path, audio)
+    except Exception as e:
+        print(f"Failed to read embedded cover for {file_path}: {e}")
+        return ""
+    return store(data) if data else ""
+
+def media_type(path: str):
+    with open(path, "rb") as f:
+        head = f.read(12)
+    for magic, media in _MEDIA_TYPES:
+        if head.startswith(magic):
+            return media
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+def cached_response(request, etag: str, resolve, vary: str = None):
+    # 304 kontrolü dosyaya dokunmadan; resolve() sadece gövde gerekirse (path, media_type) döner
+    headers = {"etag": etag, "cache-control": "public, max-age=604800"}
+    if vary:
+        headers["vary"] = vary
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    path, media = resolve()
+    return FileResponse(path, media_type=media, headers=headers)
+
+def response(request, cover_hash: str):
+    # hash içerikten geldiği için güçlü ETag; aynı kapak tüm track'lerde aynı ETag
+    path = path_for(cover_hash)
+    return cached_response(request, f'"{cover_hash}"', lambda: (path, media_type(path)))
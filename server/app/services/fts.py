@@ -0,0 +1,88 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# track başlığı / sanatçı / albüm / tür için sqlite FTS5 tablosu,
+# tracks tablosundaki trigger'larla senkron tutulur
+FTS_TABLE = "tracks_fts"
+
+enabled = False
+
+_ROW_SELECT = """
+    SELECT t.id, t.title,
+           (SELECT name FROM artists WHERE id = t.artist_id),
+           (SELECT title FROM albums WHERE id = t.album_id),
+           t.genre
+    FROM tracks t
+"""
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, artist, album, genre,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS tracks_fts_insert AFTER INSERT ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, artist, album, genre) VALUES (
+            new.id, new.title,
+            (SELECT name FROM artists WHERE id = new.artist_id),
+            (SELECT title FROM albums WHERE id = new.album_id),
+            new.genre
+        );
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tracks_fts_delete AFTER DELETE ON tracks BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tracks_fts_update AFTER UPDATE OF title, genre, artist_id, album_id ON tracks BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, title, artist, album, genre) VALUES (
+            new.id, new.title,
+            (SELECT name FROM artists WHERE id = new.artist_id),
+            (SELECT title FROM albums WHERE id = new.album_id),
+            new.genre
+        );
+    END""",
+]
+
+def ensure_fts(engine):
+    global enabled
+    if engine.dialect.name != "sqlite":
+        return False
+
+    try:
+        with engine.begin() as conn:
+            for statement in _SCHEMA:
+                conn.execute(text(statement))
+
+            indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+            total = conn.execute(text("SELECT count(*) FROM tracks")).scalar()
+            if indexed != total:
+                print(f"Rebuilding {FTS_TABLE} ({indexed} -> {total} rows)")
+                conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, title, artist, album, genre) {_ROW_SELECT}"))
+    except OperationalError as e:
+        # fts5 derlenmemiş sqlite
+        print(f"FTS5 unavailable, falling back to fuzzy search: {e}")
+        enabled = False
+        return False
+
+    enabled = True
+    return True
+
+def build_match_query(query: str):
+    # her kelime tırnaklı önek sorgusu: "beat"* "lov"* (yazarken arama için)
+    tokens = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def match(db: Session, query: str, limit: int):
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+    rows = db.execute(
+        text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q "
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 5.0, 3.0, 1.0) LIMIT :limit"
+        ),
+        {"q": match_query, "limit": limit}
+    )
+    return [row[0] for row in rows]
@@ -0,0 +1,196 @@
+import time
+from datetime import datetime
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import Session
+from app.models.music import Artist, Album, Track
+from app.core.config import settings
+from app.services import search_index, versions, covers
+
+class LibraryWriter:
+    # toplu yazıcı: track satırlarını biriktirip executemany ile yazar,
+    # her N satırda ya da T saniyede bir commit eder
+    def __init__(self, db: Session, batch_size: int = None, commit_interval: float = None):
+        self.db = db
+        self.batch_size = batch_size or settings.SCAN_BATCH_SIZE
+        self.commit_interval = settings.SCAN_COMMIT_INTERVAL if commit_interval is None else commit_interval
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+        self.failed = 0
+        self.transactions = 0
+        self._pending = []
+        self._removals = []
+        self._last_commit = time.monotonic()
+        self._folder_covers = {}
+        # yazılan kapaklar: küçük resimleri sadece bunlar için üretilir
+        self._cover_hashes = set()
+        self._load_caches()
+
+    def _load_caches(self):
+        self.artists = {name: artist_id for artist_id, name in self.db.query(Artist.id, Artist.name)}
+        self.albums = {}
+        self._album_covers = {}
+        for album_id, title, artist_id, cover, cover_hash in self.db.query(Album.id, Album.title, Album.artist_id, Album.cover_image_path, Album.cover_hash):
+            self.albums[(title, artist_id)] = album_id
+            self._album_covers[album_id] = (cover, cover_hash)
+        # yazma bağlantısı sadece flush sırasında tutulur
+        self.db.commit()
+
+    def _artist_id(self, name: str):
+        artist_id = self.artists.get(name)
+        if artist_id is None:
+            artist_id = self.db.query(Artist.id).filter(Artist.name == name).scalar()
+            if artist_id is None:
+                artist_id = self.db.execute(insert(Artist).values(name=name)).inserted_primary_key[0]
+            self.artists[name] = artist_id
+        return artist_id
+
+    def _folder_cover_hash(self, cover: str):
+        # klasör kapağı tarama başına bir kez depoya alınır
+        if cover not in self._folder_covers:
+            self._folder_covers[cover] = covers.import_file(cover)
+        return self._folder_covers[cover]
+
+    def _album_id(self, title: str, artist_id: int, year: str, cover: str, cover_hash: str):
+        key = (title, artist_id)
+        album_id = self.albums.get(key)
+        if album_id is None:
+            album_id = self.db.query(Album.id).filter(Album.title == title, Album.artist_id == artist_id).scalar()
+            if album_id is None:
+                album_id = self.db.execute(
+                    insert(Album).values(
+                        title=title, artist_id=artist_id, year=year,
+                        cover_image_path=cover, cover_hash=cover_hash, has_cover=bool(cover or cover_hash)
+                    )
+                ).inserted_primary_key[0]
+                self._album_covers[album_id] = (cover, cover_hash)
+            self.albums[key] = album_id
+
+        known_cover, known_hash = self._album_covers.get(album_id, (None, None))
+        values = {}
+        if cover and not known_cover:
+            values["cover_image_path"] = cover
+        if cover_hash and not known_hash:
+            values["cover_hash"] = cover_hash
+        if values:
+            self.db.execute(update(Album).where(Album.id == album_id).values(has_cover=True, **values))
+            self._album_covers[album_id] = (known_cover or cover, known_hash or cover_hash)
+        return album_id
+
+    def add(self, meta: dict, folder_cover_path: str = None, fingerprint=None, track_id: int = None):
+        self._pending.append((meta, folder_cover_path, fingerprint, track_id))
+        self._maybe_flush()
+
+    def remove(self, track_ids):
+        self._removals.extend(track_ids)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (len(self._pending) + len(self._removals) >= self.batch_size
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.flush()
+
+    def _write(self, items, removals):
+        inserts = []
+        updates = []
+        indexed = []
+        now = datetime.utcnow()
+        for meta, cover, fingerprint, track_id in items:
+            artist_id = self._artist_id(meta["artist"])
+            # albüm kapağı: klasördeki cover.jpg, yoksa track'in gömülü kapağı
+            album_cover_hash = (self._folder_cover_hash(cover) if cover else None) or meta.get("cover_hash")
+            self._cover_hashes.update(h for h in (album_cover_hash, meta.get("cover_hash")) if h)
+            row = {
+                "title": meta["title"],
+                "duration": meta["duration"],
+                "track_number": meta["track_number"],
+                "genre": meta["genre"],
+                "album_id": self._album_id(meta["album"], artist_id, meta["year"], cover, album_cover_hash),
+                "artist_id": artist_id,
+                "cover_hash": meta.get("cover_hash"),
+                "seek_method": meta.get("seek_method"),
+                "seek_index": meta.get("seek_index"),
+                "scanned_at": now,
+            }
+            if fingerprint:
+                row["file_size"], row["file_mtime"], row["file_inode"] = fingerprint
+            if track_id:
+                row["id"] = track_id
+                updates.append(row)
+            else:
+                row["file_path"] = meta["file_path"]
+                inserts.append(row)
+            indexed.append((track_id, meta))
+
+        for i in range(0, len(removals), 500):
+            self.db.execute(delete(Track).where(Track.id.in_(removals[i:i + 500])))
+        if inserts:
+            self.db.execute(insert(Track), inserts)
+        if updates:
+            self.db.execute(update(Track), updates)
+        new_ids = self._inserted_ids([row["file_path"] for row in inserts]) if search_index.index.active else {}
+        self.db.commit()
+        self.transactions += 1
+        versions.bump_library()
+
+        if search_index.index.active:
+            for track_id in removals:
+                search_index.index.remove(track_id)
+            for track_id, meta in indexed:
+                track_id = track_id or new_ids.get(meta["file_path"])
+                if track_id:
+                    search_index.index.upsert(track_id, meta["artist"], meta["title"], meta["album"])
+        return len(inserts), len(updates)
+
+    def take_cover_hashes(self):
+        hashes, self._cover_hashes = self._cover_hashes, set()
+        return hashes
+
+    def _inserted_ids(self, paths):
+        ids = {}
+        for i in range(0, len(paths), 500):
+            rows = self.db.query(Track.id, Track.file_path).filter(Track.file_path.in_(paths[i:i + 500]))
+            ids.update({path: track_id for track_id, path in rows})
+        return ids
+
+    def flush(self):
+        items, self._pending = self._pending, []
+        removals, self._removals = self._removals, []
+        self._last_commit = time.monotonic()
+        if not items and not removals:
+            return
+
+        try:
+            added, updated = self._write(items, removals)
+            removed = len(removals)
+        except Exception as e:
+            self.db.rollback()
+            self._load_caches()
+            print(f"Batch write failed ({e}), retrying one by one")
+            added = updated = removed = 0
+            for track_id in removals:
+                try:
+                    self._write([], [track_id])
+                    removed += 1
+                except Exception as e:
+                    self.db.rollback()
+                    self._load_caches()
+                    self.failed += 1
+                    print(f"Error removing track {track_id}: {e}")
+            for item in items:
+                try:
+                    a, u = self._write([item], [])
+                    added += a
+                    updated += u
+                except Exception as e:
+                    self.db.rollback()
+                    self._load_caches()
+                    self.failed += 1
+                    print(f"Error processing {item[0]['file_path']}: {e}")
+
+        self.added += added
+        self.updated += updated
+        self.removed += removed
+
+    def close(self):
+        self.flush()
@@ -1,43 +1,69 @@
 
+import os
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.music import Track, Album, Artist
-from rapidfuzz import process, fuzz
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import search_index, fts, queries, covers, seek, metrics
+from app.services.cache import QueryCache
+
+search_cache = QueryCache(settings.SEARCH_CACHE_ENTRIES, settings.SEARCH_CACHE_BYTES)
+
+metrics.Counter(
+    "tsukuyomi_search_cache_requests_total", "Search result cache lookups", ("result",),
+    collect=lambda: [(("hit",), search_cache.hits), (("miss",), search_cache.misses)]
+)
+
+def search_cache_key(query: str, limit: int):
+    # indeks arka planda kuruluyor: hazır olmadan alınan (fuzzy'siz) sonuçlar hazır olduktan sonra kullanılmasın
+    return (query.strip().lower(), limit, search_index.index.ready)
+
+def _match(db: Session, query_str: str, limit: int):
+    with metrics.timed(metrics.search_stage_duration, ("sql",)):
+        if settings.SEARCH_ENGINE == "fts" and fts.enabled:
+            return fts.match(db, query_str, limit)
+        return [t.id for t in db.query(Track.id).join(Artist, Track.artist_id == Artist.id).join(Album, Track.album_id == Album.id).filter(
+            (Track.title.ilike(f"%{query_str}%")) |
+            (Artist.name.ilike(f"%{query_str}%")) |
+            (Album.title.ilike(f"%{query_str}%"))
+        )]
+
+def _fuzzy(query_str: str, found, limit: int):
+    # fuzzy sadece eksik kalan sonuçlar için (yazım hatası toleransı).
+    # indeks açılışta arka planda kuruluyor, hazır değilse bu turda atlanır.
+    # cpu işi ve indeks kilidini bekleyebilir: async yolda event loop'ta çağrılmaz
+    if len(found) < limit and search_index.index.ready:
+        with metrics.timed(metrics.search_stage_duration, ("fuzzy",)):
+            found = found + search_index.index.search(query_str, limit - len(found), exclude=set(found))
+    return found[:limit]
 
 def search(db: Session, query: str, limit: int = 50):
     query_str = query.strip()
     if not query_str:
         return []
 
-    sql_results = db.query(Track).join(Artist).join(Album).filter(
-        (Track.title.ilike(f"%{query_str}%")) |
-        (Artist.name.ilike(f"%{query_str}%")) |
-        (Album.title.ilike(f"%{query_str}%"))
-    ).all()
-    
-    found_ids = {t.id for t in sql_results}
-    final_results = list(sql_results)
-    
-    if len(final_results) < limit:
-        all_tracks = db.query(Track).join(Artist).all()
-        
-        candidates = {t.id: f"{t.artist.name} {t.title} {t.album.title or ''}" for t in all_tracks if t.id not in found_ids}
-        
-        if candidates:
-            fuzzy_results = process.extract(
-                query_str, 
-                candidates, 
-                limit=limit - len(final_results), 
-                scorer=fuzz.token_set_ratio
-            )
-            
-            fuzzy_matched_ids = [res[2] for res in fuzzy_results if res[1] > 60]
-            
-            track_map = {t.id: t for t in all_tracks}
-            for mid in fuzzy_matched_ids:
-                if mid in track_map:
-                    final_results.append(track_map[mid])
-
-    return final_results[:limit]
+    found = _fuzzy(query_str, _match(db, query_str, limit), limit)
+    if not found:
+        return []
+    with metrics.timed(metrics.search_stage_duration, ("fetch",)):
+        rows = {row.id: row for row in db.execute(queries.tracks_by_ids(found))}
+    return [rows[track_id] for track_id in found if track_id in rows]
+
+async def search_async(db: AsyncSession, query: str, limit: int = 50):
+    # sql aşamaları async bağlantıda, fuzzy aşaması threadpool'da
+    query_str = query.strip()
+    if not query_str:
+        return []
+
+    found = await db.run_sync(_match, query_str, limit)
+    found = await run_in_threadpool(_fuzzy, query_str, found, limit)
+    if not found:
+        return []
+    with metrics.timed(metrics.search_stage_duration, ("fetch",)):
+        rows = {row.id: row for row in await db.execute(queries.tracks_by_ids(found))}
+    return [rows[track_id] for track_id in found if track_id in rows]
 
 def get_track_file(db: Session, track_id: int):
     track = db.query(Track).filter(Track.id == track_id).first()
@@ -45,8 +71,52 @@ def get_track_file(db: Session, track_id: int):
         return track.file_path
     return None
 
-def get_album_cover_path(db: Session, album_id: int):
+def _save(model, row_id: int, **values):
+    # okumalar salt okunur havuzdan; eksik alan doldurmak gerekirse kısa bir yazıcı oturumu açılır
+    db = SessionLocal()
+    try:
+        db.query(model).filter(model.id == row_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+def get_seek_index(db: Session, track_id: int):
+    # (dosya, yöntem, noktalar); indeksi hiç çıkarılmamış eski kayıtlarda bir kez çıkarılır
+    row = db.query(Track.file_path, Track.seek_method, Track.seek_index).filter(Track.id == track_id).first()
+    if not row:
+        return None
+    method, blob = row.seek_method, row.seek_index
+    if method is None and os.path.exists(row.file_path):
+        method, blob = seek.build(row.file_path)
+        _save(Track, track_id, seek_method=method, seek_index=blob)
+    return row.file_path, method, seek.decode(blob) if blob else None
+
+def get_album_cover_hash(db: Session, album_id: int):
     album = db.query(Album).filter(Album.id == album_id).first()
-    if album and album.cover_image_path:
-        return album.cover_image_path
-    return None
+    if not album:
+        return None
+    if covers.exists(album.cover_hash):
+        return album.cover_hash
+
+    # eski kayıt ya da silinmiş depo: klasör kapağını ya da ilk gömülü kapağı yeniden al
+    cover_hash = None
+    if album.cover_image_path and os.path.exists(album.cover_image_path):
+        cover_hash = covers.import_file(album.cover_image_path)
+    if not cover_hash:
+        track_id = db.query(Track.id).filter(Track.album_id == album_id).order_by(Track.id).limit(1).scalar()
+        cover_hash = get_track_cover_hash(db, track_id) if track_id else None
+    if cover_hash != album.cover_hash:
+        _save(Album, album_id, cover_hash=cover_hash, has_cover=bool(cover_hash or album.cover_image_path))
+    return cover_hash
+
+def get_track_cover_hash(db: Session, track_id: int):
+    # track yoksa None, kapağı yoksa ""
+    track = db.query(Track).filter(Track.id == track_id).first()
+    if not track:
+        return None
+    if track.cover_hash == "" or covers.exists(track.cover_hash):
+        return track.cover_hash
+
+    cover_hash = covers.extract(track.file_path) if os.path.exists(track.file_path) else ""
+    _save(Track, track_id, cover_hash=cover_hash)
+    return cover_hash
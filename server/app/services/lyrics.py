@@ -0,0 +1,161 @@
+import re
+import json
+import asyncio
+import unicodedata
+from datetime import datetime, timedelta
+import httpx
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.session import SessionLocal, ReadSessionLocal
+from app.models.music import LyricsCache
+from app.services import metrics
+
+# lrclib istemcisi: sonuçlar (bulunamayanlar dahil) sqlite'ta TTL ile saklanır,
+# aynı şarkı için eşzamanlı istekler tek bir upstream çağrısını paylaşır
+
+USER_AGENT = "TsukuyomiMusicPlayer/1.0 (https://github.com/ewgsta/tsukuyomi)"
+
+class LyricsUnavailable(Exception):
+    pass
+
+_client = None
+_in_flight = {}
+stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0, "upstream_errors": 0}
+
+def _hit_ratio():
+    served = stats["hits"] + stats["negative_hits"]
+    total = served + stats["misses"] + stats["coalesced"]
+    return [((), served / total if total else 0.0)]
+
+metrics.Counter(
+    "tsukuyomi_lyrics_cache_requests_total", "Lyrics lookups by cache result", ("result",),
+    collect=lambda: [((name,), stats[name]) for name in ("hits", "negative_hits", "misses", "coalesced")]
+)
+metrics.Counter("tsukuyomi_lyrics_upstream_errors_total", "Failed lrclib requests", collect=lambda: [((), stats["upstream_errors"])])
+metrics.Gauge("tsukuyomi_lyrics_cache_hit_ratio", "Share of lyrics lookups answered from the cache", collect=_hit_ratio)
+
+def _normalize(value):
+    value = unicodedata.normalize("NFKC", value or "").casefold()
+    return re.sub(r"\s+", " ", value).strip()
+
+def cache_key(artist_name: str, track_name: str, album_name: str = None, duration: float = None):
+    # lrclib süreyi ±2 sn toleransla eşliyor, saniyeye yuvarlamak yeterli
+    seconds = str(int(round(duration))) if duration else ""
+    return "\x1f".join((_normalize(artist_name), _normalize(track_name), _normalize(album_name), seconds))
+
+def client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.LYRICS_API_URL.rstrip("/") + "/",
+            headers={"User-Agent": USER_AGENT},
+            timeout=settings.LYRICS_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.LYRICS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LYRICS_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def load(key: str):
+    # (payload, süresi doldu mu); kayıt yoksa None, payload None = negatif kayıt
+    db = ReadSessionLocal()
+    try:
+        entry = db.query(LyricsCache.payload, LyricsCache.expires_at).filter(LyricsCache.key == key).first()
+    finally:
+        db.close()
+    if entry is None:
+        return None
+    payload = json.loads(entry.payload) if entry.payload is not None else None
+    return payload, entry.expires_at <= datetime.utcnow()
+
+def save(key: str, payload):
+    now = datetime.utcnow()
+    ttl = settings.LYRICS_TTL_SECONDS if payload is not None else settings.LYRICS_MISS_TTL_SECONDS
+    values = {
+        "payload": json.dumps(payload) if payload is not None else None,
+        "fetched_at": now,
+        "expires_at": now + timedelta(seconds=ttl),
+    }
+    db = SessionLocal()
+    try:
+        updated = db.query(LyricsCache).filter(LyricsCache.key == key).update(values)
+        if not updated:
+            db.add(LyricsCache(key=key, **values))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to cache lyrics: {e}")
+    finally:
+        db.close()
+
+async def fetch(artist_name: str, track_name: str, album_name: str = None, duration: float = None):
+    params = {"artist_name": artist_name, "track_name": track_name}
+    if album_name:
+        params["album_name"] = album_name
+    if duration:
+        params["duration"] = duration
+
+    try:
+        response = await client().get("get", params=params)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            return None
+
+        # doğrudan eşleşme hata verdiyse arama; süre burada fazla katı olabiliyor
+        params.pop("duration", None)
+        response = await client().get("search", params=params)
+        if response.status_code == 200:
+            data = response.json()
+            return data[0] if data else None
+        raise LyricsUnavailable(f"lrclib returned {response.status_code}")
+    except (httpx.HTTPError, ValueError) as e:
+        raise LyricsUnavailable(str(e))
+
+async def _refresh(key: str, artist_name: str, track_name: str, album_name: str, duration: float):
+    try:
+        payload = await fetch(artist_name, track_name, album_name, duration)
+    except LyricsUnavailable:
+        stats["upstream_errors"] += 1
+        raise
+    await run_in_threadpool(save, key, payload)
+    return payload
+
+def _finished(key: str, task):
+    _in_flight.pop(key, None)
+    if not task.cancelled():
+        # bekleyen kalmadıysa "exception was never retrieved" uyarısı çıkmasın
+        task.exception()
+
+async def get_lyrics(artist_name: str, track_name: str, album_name: str = None, duration: float = None):
+    # sözler ya da bulunamadıysa None; upstream'e ulaşılamazsa LyricsUnavailable
+    key = cache_key(artist_name, track_name, album_name, duration)
+    cached = await run_in_threadpool(load, key)
+    if cached is not None and not cached[1]:
+        stats["hits" if cached[0] is not None else "negative_hits"] += 1
+        return cached[0]
+
+    task = _in_flight.get(key)
+    if task is None:
+        stats["misses"] += 1
+        task = asyncio.ensure_future(_refresh(key, artist_name, track_name, album_name, duration))
+        _in_flight[key] = task
+        task.add_done_callback(lambda t: _finished(key, t))
+    else:
+        stats["coalesced"] += 1
+
+    try:
+        # shield: bir istemci bağlantıyı kesse de diğerleri aynı sonucu bekliyor
+        return await asyncio.shield(task)
+    except LyricsUnavailable:
+        if cached is not None:
+            # süresi dolmuş kayıt, hiç yoktan iyidir
+            return cached[0]
+        raise
@@ -0,0 +1,225 @@
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.core.config import settings
+
+# prometheus text formatında hafif metrikler: kayıt başına bir kilit + dict güncellemesi,
+# üretimde açık kalabilir. bazı değerler (watcher kuyruğu, cache istatistikleri)
+# sadece /metrics okunurken toplanır
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+registry = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        # collect: okuma anında [(etiket değerleri, değer)] döner
+        self.collect = collect
+        self._lock = threading.Lock()
+        self._values = {}
+        registry.append(self)
+
+    def samples(self):
+        if self.collect is not None:
+            return list(self.collect())
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self.samples():
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        # kovalar birikimsiz tutulur, toplama render'da yapılır
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            entries = [(values, list(counts), total, count) for values, (counts, total, count) in self._values.items()]
+        for values, counts, total, count in entries:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {count}")
+        return lines
+
+class timed:
+    # with metrics.timed(histogram, ("etiket",)): ...
+    def __init__(self, histogram: Histogram, labels=()):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.labels)
+
+def render():
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# http
+http_request_duration = Histogram(
+    "tsukuyomi_http_request_duration_seconds",
+    "Time until response headers are sent, per route",
+    ("method", "route", "status"),
+)
+http_db_queries = Histogram(
+    "tsukuyomi_http_db_queries",
+    "SQL statements executed per request",
+    ("route",),
+    COUNT_BUCKETS,
+)
+db_queries = Counter("tsukuyomi_db_queries_total", "SQL statements executed")
+
+# arama
+search_stage_duration = Histogram(
+    "tsukuyomi_search_stage_seconds",
+    "library.search time per stage (sql = fts/ilike, fuzzy = memory index, fetch = row load)",
+    ("stage",),
+)
+
+# tarama
+scan_parse_duration = Histogram(
+    "tsukuyomi_scan_parse_seconds",
+    "Metadata parse time per file",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+scan_files = Counter("tsukuyomi_scan_files_total", "Files processed by scans", ("result",))
+scan_runs = Counter("tsukuyomi_scan_runs_total", "Finished scans", ("status",))
+scan_rate = Gauge("tsukuyomi_scan_last_tracks_per_second", "Throughput of the last finished scan")
+
+# watcher
+watcher_events = Counter("tsukuyomi_watcher_events_total", "File system events queued by the watcher", ("action",))
+watcher_batch_lag = Histogram(
+    "tsukuyomi_watcher_batch_lag_seconds",
+    "Time from first event to commit for watcher batches",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+# yayın
+active_streams = Gauge("tsukuyomi_active_streams", "Audio responses currently being sent")
+stream_bytes = Counter("tsukuyomi_stream_bytes_total", "Audio bytes sent by stream_track")
+
+_request_queries = ContextVar("request_queries", default=None)
+
+def _count_query(*args):
+    db_queries.inc()
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+def route_label(scope):
+    # etiket olarak şablon yol (/api/v1/music/stream/{track_id}); eşleşmeyen istekler tek etikette.
+    # route.path router prefix'ini içermiyor, prefix gerçek yoldan geri çıkarılır
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope["path"]
+    index = path.rfind("/")
+    while index > 0:
+        if route.path_regex.match(path[index:]):
+            return path[:index] + template
+        index = path.rfind("/", 0, index)
+    return template
+
+class MetricsMiddleware:
+    # saf ASGI: yanıt gövdesini sarmadığı için yayınları yavaşlatmaz
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        state = {"status": 500, "headers_at": None}
+        # threadpool'a kopyalanan context aynı listeyi görür
+        token = _request_queries.set([0])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["headers_at"] = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            queries = _request_queries.get()[0]
+            _request_queries.reset(token)
+            route = route_label(scope)
+            elapsed = (state["headers_at"] or time.perf_counter()) - started
+            http_request_duration.observe(elapsed, (scope["method"], route, str(state["status"])))
+            http_db_queries.observe(queries, (route,))
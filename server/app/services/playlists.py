@@ -0,0 +1,127 @@
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.music import Playlist, PlaylistTrack, Track
+from app.services import versions
+
+# çalma listesi sırası seyrek tam sayılarla tutulur: sona ekleme max + GAP, araya ekleme ve taşıma
+# komşuların ortası. böylece bir taşıma tek satır yazar; iki komşu arasında boşluk kalmadıysa
+# (ya da eski db'lerdeki gibi aynı pozisyon varsa) liste bir kez baştan numaralanır
+
+POSITION_GAP = 1024
+
+class NotFound(LookupError):
+    # args[0]: hata detayı (metin ya da dict)
+    pass
+
+def append_track(db: Session, playlist_id: int, track_id: int):
+    if not db.get(Playlist, playlist_id):
+        raise NotFound("Playlist not found")
+    if not db.get(Track, track_id):
+        raise NotFound("Track not found")
+
+    # varlık kontrolü ve son pozisyon tek sorguda
+    last, existing = db.query(
+        func.max(PlaylistTrack.position),
+        func.count(PlaylistTrack.id).filter(PlaylistTrack.track_id == track_id)
+    ).filter(PlaylistTrack.playlist_id == playlist_id).one()
+    if existing:
+        return False
+
+    db.add(PlaylistTrack(
+        playlist_id=playlist_id,
+        track_id=track_id,
+        position=(last or 0) + POSITION_GAP,
+        added_at=datetime.utcnow()
+    ))
+    db.commit()
+    versions.bump_playlist(playlist_id)
+    return True
+
+def _load_entries(db: Session, playlist_id: int):
+    return db.query(PlaylistTrack).filter(
+        PlaylistTrack.playlist_id == playlist_id
+    ).order_by(PlaylistTrack.position, PlaylistTrack.id).all()
+
+def _renumber(entries):
+    for i, entry in enumerate(entries):
+        entry.position = (i + 1) * POSITION_GAP
+
+def _insert(entries, index: int, new_entries):
+    # yeni kayıtlar komşuların arasına eşit aralıkla yerleşir; yer yetmezse tüm liste numaralanır
+    before = entries[index - 1].position if index > 0 else None
+    after = entries[index].position if index < len(entries) else None
+    count = len(new_entries)
+    entries[index:index] = new_entries
+    if before is None and after is None:
+        _renumber(entries)
+    elif after is None:
+        for i, entry in enumerate(new_entries):
+            entry.position = before + (i + 1) * POSITION_GAP
+    elif before is None:
+        for i, entry in enumerate(new_entries):
+            entry.position = after - (count - i) * POSITION_GAP
+    elif (after - before) // (count + 1) >= 1:
+        step = (after - before) // (count + 1)
+        for i, entry in enumerate(new_entries):
+            entry.position = before + (i + 1) * step
+    else:
+        _renumber(entries)
+
+def apply_operations(db: Session, playlist_id: int, operations):
+    # operations: [{"op": "add", "track_ids": [...], "index": n?}, {"op": "remove", "track_ids": [...]},
+    # {"op": "move", "track_id": x, "index": n}]. index mevcut sıraya göre 0 tabanlı; hepsi tek transaction
+    if not db.get(Playlist, playlist_id):
+        raise NotFound("Playlist not found")
+
+    wanted = {track_id for op in operations if op["op"] == "add" for track_id in op["track_ids"]}
+    if wanted:
+        found = {track_id for (track_id,) in db.query(Track.id).filter(Track.id.in_(wanted))}
+        missing = sorted(wanted - found)
+        if missing:
+            raise NotFound({"message": "Tracks not found", "track_ids": missing})
+
+    entries = _load_entries(db, playlist_id)
+    by_track = {entry.track_id: entry for entry in entries}
+    now = datetime.utcnow()
+    result = {"added": 0, "removed": 0, "moved": 0, "skipped": []}
+
+    for op in operations:
+        if op["op"] == "add":
+            index = len(entries) if op.get("index") is None else max(0, min(op["index"], len(entries)))
+            new_entries = []
+            for track_id in op["track_ids"]:
+                if track_id in by_track:
+                    result["skipped"].append(track_id)
+                    continue
+                entry = PlaylistTrack(playlist_id=playlist_id, track_id=track_id, added_at=now)
+                by_track[track_id] = entry
+                new_entries.append(entry)
+            if new_entries:
+                _insert(entries, index, new_entries)
+                db.add_all(new_entries)
+                result["added"] += len(new_entries)
+
+        elif op["op"] == "remove":
+            removing = {track_id for track_id in op["track_ids"] if track_id in by_track}
+            for track_id in removing:
+                entry = by_track.pop(track_id)
+                # aynı istekte eklenip çıkarılan kayıt henüz db'de yok
+                if entry in db.new:
+                    db.expunge(entry)
+                else:
+                    db.delete(entry)
+            entries = [entry for entry in entries if entry.track_id not in removing]
+            result["removed"] += len(removing)
+
+        elif op["op"] == "move":
+            entry = by_track.get(op["track_id"])
+            if entry is None:
+                raise NotFound({"message": "Track not in playlist", "track_id": op["track_id"]})
+            entries.remove(entry)
+            _insert(entries, max(0, min(op["index"], len(entries))), [entry])
+            result["moved"] += 1
+
+    db.commit()
+    versions.bump_playlist(playlist_id)
+    return result
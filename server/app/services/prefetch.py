@@ -0,0 +1,221 @@
+import json
+import time
+import asyncio
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.session import SessionLocal, ReadSessionLocal
+from app.models.music import LyricsPrefetchJob, PlaylistTrack, Favorite
+from app.services import lyrics, queries
+
+# şarkı sözü ön yükleme: playlist / favoriler / çalma kuyruğu için lyrics cache'ini
+# arka planda doldurur. tek worker, lrclib'e hız sınırlı gider; ilerleme db'de tutulur,
+# sunucu yeniden başlarsa yarım kalan iş kaldığı yerden devam eder.
+
+ACTIVE = ("queued", "running")
+
+_queue = None
+_worker = None
+_loop = None
+_cancelled = set()
+
+def job_dict(job: LyricsPrefetchJob):
+    total = len(json.loads(job.track_ids))
+    return {
+        "id": job.id,
+        "source": job.source,
+        "status": job.status,
+        "total": total,
+        "done": job.position,
+        "fetched": job.fetched,
+        "cached": job.cached,
+        "missing": job.missing,
+        "failed": job.failed,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+def resolve_tracks(db, source: str, playlist_id: int = None, track_ids=None, limit: int = None):
+    if source == "playlist":
+        rows = db.query(PlaylistTrack.track_id).filter(
+            PlaylistTrack.playlist_id == playlist_id
+        ).order_by(PlaylistTrack.position, PlaylistTrack.id)
+        ids = [track_id for (track_id,) in rows]
+    elif source == "favorites":
+        ids = [track_id for (track_id,) in db.query(Favorite.track_id).order_by(Favorite.added_at.desc())]
+    else:
+        ids = list(track_ids or [])[:limit or settings.LYRICS_PREFETCH_QUEUE_AHEAD]
+    # aynı şarkı iki kez sorulmasın, sıra korunur
+    return list(dict.fromkeys(ids))
+
+def create_job(db, source: str, track_ids):
+    # aynı kaynak için bekleyen iş varsa yenisi açılmaz
+    encoded = json.dumps(track_ids)
+    existing = db.query(LyricsPrefetchJob).filter(
+        LyricsPrefetchJob.source == source,
+        LyricsPrefetchJob.track_ids == encoded,
+        LyricsPrefetchJob.status.in_(ACTIVE)
+    ).first()
+    if existing:
+        return existing, False
+
+    job = LyricsPrefetchJob(source=source, track_ids=encoded)
+    db.add(job)
+    db.commit()
+    return job, True
+
+def get_job(db, job_id: int):
+    return db.query(LyricsPrefetchJob).filter(LyricsPrefetchJob.id == job_id).first()
+
+def submit(job_id: int):
+    # endpoint'ler threadpool'da çalışıyor; kuyruğa event loop üzerinden eklenir
+    if _queue is not None:
+        _loop.call_soon_threadsafe(_queue.put_nowait, job_id)
+
+def cancel(db, job_id: int):
+    job = get_job(db, job_id)
+    if job and job.status in ACTIVE:
+        job.status = "cancelled"
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        _cancelled.add(job_id)
+    return job
+
+def _load_job(job_id: int):
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        if not job or job.status not in ACTIVE:
+            return None
+        job.status = "running"
+        db.commit()
+        return job.position, json.loads(job.track_ids)
+    finally:
+        db.close()
+
+def _load_tracks(track_ids):
+    db = ReadSessionLocal()
+    try:
+        rows = {row.id: row for row in db.execute(queries.tracks_by_ids(track_ids))}
+    finally:
+        db.close()
+    return [rows.get(track_id) for track_id in track_ids]
+
+def _checkpoint(job_id: int, position: int = None, counts: dict = None, status: str = None):
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        if not job:
+            return
+        if position is not None:
+            job.position = position
+        for name, value in (counts or {}).items():
+            setattr(job, name, getattr(job, name) + value)
+        # iptal edilmiş işin durumunu ezme
+        if status and job.status != "cancelled":
+            job.status = status
+        job.updated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+class _RateLimit:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        if self.next_at > now:
+            await asyncio.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+async def _prefetch_track(row, limiter: _RateLimit):
+    album = row.album_title or None
+    key = lyrics.cache_key(row.artist, row.title, album, row.duration)
+    cached = await run_in_threadpool(lyrics.load, key)
+    if cached is not None and not cached[1]:
+        return "cached"
+
+    await limiter.wait()
+    try:
+        payload = await lyrics.get_lyrics(row.artist, row.title, album, row.duration)
+    except lyrics.LyricsUnavailable:
+        return "failed"
+    if payload is None:
+        return "missing"
+    if album:
+        # favori / playlist satırlarında albüm adı yok, istemci o zaman albümsüz soruyor
+        await run_in_threadpool(lyrics.save, lyrics.cache_key(row.artist, row.title, None, row.duration), payload)
+    return "fetched"
+
+async def run_job(job_id: int, limiter: _RateLimit):
+    loaded = await run_in_threadpool(_load_job, job_id)
+    if loaded is None:
+        _cancelled.discard(job_id)
+        return
+    position, track_ids = loaded
+    checkpoint = max(settings.LYRICS_PREFETCH_CHECKPOINT, 1)
+
+    while position < len(track_ids):
+        batch = track_ids[position:position + checkpoint]
+        counts = {"fetched": 0, "cached": 0, "missing": 0, "failed": 0}
+        for row in await run_in_threadpool(_load_tracks, batch):
+            if job_id in _cancelled:
+                break
+            if row is None:
+                # bu arada silinmiş track
+                counts["missing"] += 1
+            else:
+                counts[await _prefetch_track(row, limiter)] += 1
+            position += 1
+        await run_in_threadpool(_checkpoint, job_id, position, counts)
+        if job_id in _cancelled:
+            _cancelled.discard(job_id)
+            return
+
+    await run_in_threadpool(_checkpoint, job_id, position, None, "done")
+
+async def _work():
+    limiter = _RateLimit(settings.LYRICS_PREFETCH_RATE)
+    while True:
+        job_id = await _queue.get()
+        try:
+            await run_job(job_id, limiter)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Lyrics prefetch job {job_id} failed: {e}")
+            await run_in_threadpool(_checkpoint, job_id, None, None, "failed")
+
+def _pending_jobs():
+    db = ReadSessionLocal()
+    try:
+        return [job_id for (job_id,) in db.query(LyricsPrefetchJob.id).filter(
+            LyricsPrefetchJob.status.in_(ACTIVE)
+        ).order_by(LyricsPrefetchJob.id)]
+    finally:
+        db.close()
+
+def start():
+    global _queue, _worker, _loop
+    _loop = asyncio.get_running_loop()
+    _queue = asyncio.Queue()
+    _worker = _loop.create_task(_work())
+    pending = _pending_jobs()
+    for job_id in pending:
+        _queue.put_nowait(job_id)
+    if pending:
+        print(f"Resuming {len(pending)} lyrics prefetch jobs")
+
+async def stop():
+    global _queue, _worker
+    if _worker is not None:
+        # yarım kalan iş "running" olarak kalır, sonraki açılışta devam eder
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+    _queue = None
+    _worker = None
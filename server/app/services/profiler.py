@@ -0,0 +1,194 @@
+import hmac
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from sqlalchemy import event
+from app.core.config import settings
+from app.services import metrics
+
+# isteğe bağlı istek profili + yavaş sorgu logu. hiçbir ayar verilmezse engine'lere dinleyici bile eklenmez.
+# cProfile event loop thread'inde çalışır: async endpoint'lerin python süresi görünür, threadpool'daki
+# sync endpoint'ler için özet await'te kalır ama sql listesi yine eksiksizdir (context threadpool'a kopyalanıyor).
+# aynı anda tek istek cProfile altında koşar, diğerleri sadece sql kaydı alır
+
+PROFILE_HEADER = "x-profile-token"
+
+_history = deque(maxlen=settings.PROFILE_HISTORY)
+slow_queries = deque(maxlen=settings.SLOW_QUERY_HISTORY)
+_lock = threading.Lock()
+_profiler_busy = threading.Lock()
+_next_id = 0
+
+# o an profillenen istek kaydı ve (yavaş sorgu logu için) istek scope'u
+_current = ContextVar("profile_current", default=None)
+_scope = ContextVar("profile_scope", default=None)
+
+def enabled():
+    # örneklenen profiller de sadece token ile okunabiliyor; token yoksa örnekleme de kapalı
+    return bool(settings.PROFILE_TOKEN)
+
+if settings.PROFILE_SAMPLE_RATE > 0 and not settings.PROFILE_TOKEN:
+    print("PROFILE_SAMPLE_RATE is ignored without PROFILE_TOKEN")
+
+def slow_log_enabled():
+    return settings.SLOW_QUERY_MS > 0
+
+def check_token(token: str):
+    return bool(settings.PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, settings.PROFILE_TOKEN)
+
+def _wants_profile(scope):
+    if scope["path"].startswith(settings.API_V1_STR + "/debug"):
+        return False
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode():
+            return check_token(value.decode("latin-1"))
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+def _origin():
+    scope = _scope.get()
+    if scope is None:
+        # tarama, watcher vb.
+        return threading.current_thread().name
+    return metrics.route_label(scope)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    # başlangıç ifadenin kendi context'inde: hata veren sorgu sonraki ölçümleri kaydırmaz
+    if context is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profile_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    record = _current.get()
+    if record is not None:
+        record["queries"].append({
+            "sql": statement,
+            "parameters": repr(parameters)[:500],
+            "ms": round(elapsed_ms, 3),
+            "executemany": executemany,
+        })
+
+    if slow_log_enabled() and elapsed_ms >= settings.SLOW_QUERY_MS:
+        origin = _origin()
+        slow_queries.append({
+            "at": datetime.utcnow().isoformat(),
+            "origin": origin,
+            "ms": round(elapsed_ms, 3),
+            "sql": statement,
+        })
+        print(f"Slow query ({elapsed_ms:.0f} ms, {origin}): {' '.join(statement.split())[:300]}")
+
+def instrument_engine(engine):
+    if not (enabled() or slow_log_enabled()):
+        return
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+
+def _top_functions(stats, limit: int, field: int):
+    # field: 2 = kendi süresi, 3 = kümülatif
+    rows = sorted(stats.items(), key=lambda item: item[1][field], reverse=True)[:limit]
+    return [{
+        "function": f"{filename}:{line}({name})",
+        "calls": calls,
+        "own_ms": round(own * 1000, 3),
+        "cumulative_ms": round(cumulative * 1000, 3),
+    } for (filename, line, name), (_, calls, own, cumulative, _) in rows]
+
+def _summary(record):
+    return {
+        "id": record["id"],
+        "started_at": record["started_at"],
+        "method": record["method"],
+        "path": record["path"],
+        "route": record["route"],
+        "status": record["status"],
+        "duration_ms": record["duration_ms"],
+        "queries": len(record["queries"]),
+        "sql_ms": round(sum(query["ms"] for query in record["queries"]), 3),
+        "profiled": record["functions"] is not None,
+    }
+
+def profiles():
+    with _lock:
+        return [_summary(record) for record in reversed(_history)]
+
+def get_profile(profile_id: int):
+    with _lock:
+        for record in _history:
+            if record["id"] == profile_id:
+                return dict(_summary(record), functions=record["functions"], hotspots=record["hotspots"], sql=record["queries"])
+    return None
+
+def clear():
+    with _lock:
+        _history.clear()
+    slow_queries.clear()
+
+class ProfilerMiddleware:
+    # saf ASGI; profil kimliği X-Profile-Id başlığında döner
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (enabled() or slow_log_enabled()):
+            return await self.app(scope, receive, send)
+
+        scope_token = _scope.set(scope)
+        if not (enabled() and _wants_profile(scope)):
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                _scope.reset(scope_token)
+
+        global _next_id
+        with _lock:
+            _next_id += 1
+            profile_id = _next_id
+        record = {
+            "id": profile_id,
+            "started_at": datetime.utcnow().isoformat(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": None,
+            "status": 500,
+            "duration_ms": None,
+            "queries": [],
+            "functions": None,
+            "hotspots": None,
+        }
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", str(profile_id).encode())]
+            await send(message)
+
+        profile = cProfile.Profile() if _profiler_busy.acquire(blocking=False) else None
+        record_token = _current.set(record)
+        started = time.perf_counter()
+        try:
+            if profile is not None:
+                profile.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profile is not None:
+                profile.disable()
+                _profiler_busy.release()
+                stats = pstats.Stats(profile).stats
+                # kümülatif liste çağrı zincirini, kendi süresine göre liste sıcak noktaları gösterir
+                record["functions"] = _top_functions(stats, settings.PROFILE_TOP_FUNCTIONS, 3)
+                record["hotspots"] = _top_functions(stats, settings.PROFILE_TOP_FUNCTIONS, 2)
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            record["route"] = metrics.route_label(scope)
+            _current.reset(record_token)
+            _scope.reset(scope_token)
+            with _lock:
+                _history.append(record)
@@ -0,0 +1,86 @@
+from sqlalchemy import select, func
+from app.models.music import Track, Artist, Album, Favorite, Playlist, PlaylistTrack
+
+# liste endpoint'leri için ortak sorgular: ORM nesnesi yüklemeden,
+# tek round-trip'te sadece gereken kolonlar (N+1 yok)
+
+def track_select(*extra):
+    return select(
+        Track.id,
+        Track.title,
+        Artist.name.label("artist"),
+        Album.id.label("album_id"),
+        Album.title.label("album_title"),
+        Track.duration,
+        Album.has_cover,
+        *extra
+    ).select_from(Track).outerjoin(
+        Artist, Track.artist_id == Artist.id
+    ).outerjoin(
+        Album, Track.album_id == Album.id
+    )
+
+def tracks_by_ids(ids):
+    return track_select().where(Track.id.in_(ids))
+
+def favorites():
+    return track_select(Favorite.added_at).join(
+        Favorite, Favorite.track_id == Track.id
+    ).order_by(Favorite.added_at.desc())
+
+def playlist_tracks(playlist_id: int):
+    return track_select(PlaylistTrack.position).join(
+        PlaylistTrack, PlaylistTrack.track_id == Track.id
+    ).where(PlaylistTrack.playlist_id == playlist_id).order_by(PlaylistTrack.position, PlaylistTrack.id)
+
+def playlists():
+    return select(
+        Playlist.id,
+        Playlist.name,
+        Playlist.created_at,
+        func.count(PlaylistTrack.id).label("track_count")
+    ).outerjoin(
+        PlaylistTrack, PlaylistTrack.playlist_id == Playlist.id
+    ).group_by(Playlist.id).order_by(Playlist.created_at.desc())
+
+def search_row(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "artist": row.artist,
+        "album": row.album_title,
+        "duration": row.duration,
+        "album_id": row.album_id,
+        "has_cover": bool(row.has_cover)
+    }
+
+def favorite_row(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "artist": row.artist or "Bilinmeyen",
+        "album_id": row.album_id,
+        "album_title": row.album_title,
+        "duration": row.duration,
+        "has_cover": bool(row.has_cover),
+        "added_at": row.added_at.isoformat() if row.added_at else None
+    }
+
+def playlist_track_row(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "artist": row.artist or "Bilinmeyen",
+        "album_id": row.album_id,
+        "duration": row.duration,
+        "has_cover": bool(row.has_cover),
+        "position": row.position
+    }
+
+def playlist_row(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "track_count": row.track_count,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
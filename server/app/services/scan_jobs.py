@@ -0,0 +1,211 @@
+import os
+import queue
+import threading
+from datetime import datetime
+from app.db.session import SessionLocal, ReadSessionLocal
+from app.models.music import ScanJob
+from app.services import scanner
+
+# tarama job'ları: POST /scan, ayar değişikliği ve açılış taraması buradan geçer.
+# tek worker thread sırayla çalıştırır; aynı klasör için bekleyen job varsa yenisi açılmaz.
+# ilerleme periyodik olarak db'ye yazılır, sunucu kapanırsa job açılışta kaldığı yerden devam eder
+# (tam taramada da: job başladıktan sonra okunmuş dosyalar tekrar okunmaz)
+
+ACTIVE = ("queued", "running")
+
+_queue = queue.Queue()
+_worker = None
+_stopping = threading.Event()
+_lock = threading.Lock()
+# çalışan job'ların canlı ilerlemesi (job id -> ScanProgress)
+_running = {}
+
+def job_dict(job: ScanJob):
+    progress = _running.get(job.id)
+    data = {
+        "id": job.id,
+        "directory": job.directory,
+        "full": job.full,
+        "status": job.status,
+        "phase": job.phase,
+        "files_seen": job.files_seen,
+        "files_queued": job.files_queued,
+        "files_parsed": job.files_parsed,
+        "files_failed": job.files_failed,
+        "added_tracks": job.added,
+        "updated_tracks": job.updated,
+        "removed_tracks": job.removed,
+        "eta_seconds": None,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+    if progress is not None and job.status == "running":
+        # db'deki son checkpoint'ten daha güncel
+        live = progress.snapshot()
+        for name in ("phase", "files_seen", "files_queued", "files_parsed", "files_failed", "eta_seconds"):
+            data[name] = live[name]
+    return data
+
+def get_job(db, job_id: int):
+    return db.query(ScanJob).filter(ScanJob.id == job_id).first()
+
+def recent_jobs(db, limit: int = 20):
+    return db.query(ScanJob).order_by(ScanJob.id.desc()).limit(limit).all()
+
+def create_job(db, directory: str, full: bool = False, workers: int = None, files_per_sec: float = None, mb_per_sec: float = None):
+    directory = os.path.abspath(directory)
+    with _lock:
+        existing = db.query(ScanJob).filter(
+            ScanJob.directory == directory,
+            ScanJob.full == full,
+            ScanJob.status.in_(ACTIVE)
+        ).first()
+        if existing:
+            return existing, False
+
+        job = ScanJob(directory=directory, full=full, workers=workers, files_per_sec=files_per_sec, mb_per_sec=mb_per_sec)
+        db.add(job)
+        db.commit()
+    _queue.put(job.id)
+    return job, True
+
+def cancel(db, job_id: int):
+    job = get_job(db, job_id)
+    if job and job.status in ACTIVE:
+        job.status = "cancelled"
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        progress = _running.get(job_id)
+        if progress is not None:
+            progress.cancel()
+    return job
+
+def _update(job_id: int, **values):
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        if not job:
+            return None
+        # iptal edilmiş job'un durumunu ezme
+        if job.status == "cancelled":
+            values.pop("status", None)
+        for name, value in values.items():
+            setattr(job, name, value)
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        return job.status
+    finally:
+        db.close()
+
+def _checkpoint(job_id: int, base, progress: scanner.ScanProgress):
+    status = _update(
+        job_id,
+        phase=progress.phase,
+        files_seen=progress.seen,
+        files_queued=progress.queued,
+        files_parsed=progress.parsed,
+        files_failed=progress.failed,
+        added=base[0] + progress.added,
+        updated=base[1] + progress.updated,
+        removed=base[2] + progress.removed,
+    )
+    # başka bir istek iptal ettiyse (ya da job silindiyse) tarama dursun
+    if status in (None, "cancelled"):
+        progress.cancel()
+
+def _load(job_id: int):
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        if not job or job.status not in ACTIVE:
+            return None
+        job.status = "running"
+        job.attempts = (job.attempts or 0) + 1
+        if job.started_at is None:
+            job.started_at = datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        return {
+            "directory": job.directory,
+            "full": job.full,
+            "workers": job.workers,
+            "budget": scanner.IOBudget(job.files_per_sec, job.mb_per_sec),
+            "base": (job.added or 0, job.updated or 0, job.removed or 0),
+            "since": job.started_at,
+        }
+    finally:
+        db.close()
+
+def run_job(job_id: int):
+    loaded = _load(job_id)
+    if loaded is None:
+        return
+    base = loaded["base"]
+    progress = scanner.ScanProgress(on_checkpoint=lambda p: _checkpoint(job_id, base, p))
+    _running[job_id] = progress
+    try:
+        db = SessionLocal()
+        try:
+            result = scanner.scan_library(
+                db, loaded["directory"], loaded["workers"], loaded["full"],
+                progress=progress, budget=loaded["budget"], since=loaded["since"]
+            )
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"Scan job {job_id} failed: {e}")
+        _update(job_id, status="failed", phase="error", error=str(e))
+        return
+    finally:
+        _running.pop(job_id, None)
+
+    if result["status"] == "error":
+        _update(job_id, status="failed", phase="error", error=result.get("message"))
+    elif progress.cancelled and _stopping.is_set():
+        # kapanış: "running" kalır, sonraki açılışta kaldığı yerden devam
+        _update(job_id, phase="interrupted")
+    else:
+        _update(job_id, status="cancelled" if progress.cancelled else "done")
+
+def _work():
+    while not _stopping.is_set():
+        job_id = _queue.get()
+        if job_id is None:
+            break
+        try:
+            run_job(job_id)
+        except Exception as e:
+            print(f"Scan job {job_id} failed: {e}")
+
+def _pending_jobs():
+    db = ReadSessionLocal()
+    try:
+        return [job_id for (job_id,) in db.query(ScanJob.id).filter(
+            ScanJob.status.in_(ACTIVE)
+        ).order_by(ScanJob.id)]
+    finally:
+        db.close()
+
+def start():
+    global _worker
+    _stopping.clear()
+    pending = _pending_jobs()
+    for job_id in pending:
+        _queue.put(job_id)
+    if pending:
+        print(f"Resuming {len(pending)} scan jobs")
+    _worker = threading.Thread(target=_work, name="scan-jobs", daemon=True)
+    _worker.start()
+
+def stop(timeout: float = 10.0):
+    global _worker
+    _stopping.set()
+    for progress in list(_running.values()):
+        progress.cancel()
+    _queue.put(None)
+    if _worker is not None:
+        _worker.join(timeout)
+    _worker = None
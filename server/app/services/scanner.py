@@ -1,96 +1,425 @@
-
 import os
+import time
 import mutagen
+import multiprocessing
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy.orm import Session
 from app.models.music import Artist, Album, Track
 from app.core.config import settings
-from mutagen.easyid3 import EasyID3
-from mutagen.flac import FLAC
+from app.services.ingest import LibraryWriter
+from app.services import search_index, versions, covers, thumbnails, seek, metrics
+from mutagen.id3 import ID3
+from mutagen.mp4 import MP4Tags
 
 # ses formatları bunlar yeter glb
 SUPPORTED_EXTENSIONS = {'.mp3', '.flac', '.wav', '.m4a', '.ogg'}
 
-def scan_library(db: Session, directory: str = None):
+def resolve_workers(workers: int = None):
+    workers = settings.SCAN_WORKERS if workers is None else workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def file_fingerprint(file_path: str):
+    st = os.stat(file_path)
+    # windows dosya id'leri 64 bit işaretsiz olabiliyor, sqlite INTEGER'a sığsın
+    inode = st.st_ino & 0x7FFFFFFFFFFFFFFF
+    return (st.st_size, st.st_mtime, inode or None)
+
+def find_folder_cover(folder: str, files=None):
+    if files is None:
+        try:
+            files = os.listdir(folder)
+        except OSError:
+            return None
+    for img in ['cover.jpg', 'album.jpg']:
+        if img in files:
+            return os.path.join(folder, img)
+    return None
+
+def load_fingerprints(db: Session):
+    # tek sorguda tüm parmak izleri, fark bellekte hesaplanır.
+    # kapağına hiç bakılmamış (cover_hash NULL) satırlar bir kez yeniden okunur
+    rows = db.query(Track.id, Track.file_path, Track.file_size, Track.file_mtime, Track.file_inode, Track.cover_hash).all()
+    return {
+        path: (track_id, (size, mtime, inode) if cover_hash is not None else None)
+        for track_id, path, size, mtime, inode, cover_hash in rows
+    }
+
+class IOBudget:
+    # okuma bütçesi (dosya/sn, MB/sn): ortalama hız sınırı aşıyorsa okumadan önce bekler,
+    # aynı diskten yapılan yayınlar tarama yüzünden takılmasın
+    def __init__(self, files_per_sec: float = None, mb_per_sec: float = None):
+        self.files_per_sec = settings.SCAN_MAX_FILES_PER_SEC if files_per_sec is None else files_per_sec
+        mb_per_sec = settings.SCAN_MAX_MB_PER_SEC if mb_per_sec is None else mb_per_sec
+        self.bytes_per_sec = mb_per_sec * 1024 * 1024
+        self._started = None
+        self._files = 0
+        self._bytes = 0
+
+    @property
+    def limited(self):
+        return self.files_per_sec > 0 or self.bytes_per_sec > 0
+
+    def wait(self, files: int, nbytes: int, progress=None):
+        if not self.limited:
+            return
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        self._files += files
+        self._bytes += nbytes
+        due = max(
+            self._files / self.files_per_sec if self.files_per_sec > 0 else 0.0,
+            self._bytes / self.bytes_per_sec if self.bytes_per_sec > 0 else 0.0,
+        )
+        # iptal uzun bir beklemeyi kesebilsin
+        while now < self._started + due and not (progress and progress.cancelled):
+            time.sleep(min(self._started + due - now, 0.5))
+            now = time.monotonic()
+
+class ScanProgress:
+    # tarama ilerlemesi: başka thread'den okunur (health, job durumu) ve iptal edilebilir.
+    # on_checkpoint verilirse belli aralıklarla (yazıcı flush edildikten sonra) çağrılır
+    def __init__(self, on_checkpoint=None, checkpoint_interval: float = None):
+        self.phase = "pending"
+        self.seen = 0
+        self.queued = 0
+        self.parsed = 0
+        self.failed = 0
+        self.started_at = None
+        self.parse_started_at = None
+        self.finished_at = None
+        self.cancelled = False
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+        self.on_checkpoint = on_checkpoint
+        self.checkpoint_interval = settings.SCAN_CHECKPOINT_SECONDS if checkpoint_interval is None else checkpoint_interval
+        self._last_checkpoint = time.monotonic()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def checkpoint_due(self):
+        return self.on_checkpoint is not None and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+
+    def checkpoint(self, writer: LibraryWriter = None):
+        if writer is not None:
+            self.added, self.updated, self.removed = writer.added, writer.updated, writer.removed
+        self._last_checkpoint = time.monotonic()
+        if self.on_checkpoint is not None:
+            self.on_checkpoint(self)
+
+    def eta_seconds(self):
+        # dosya listesi çıkmadan toplam bilinmiyor
+        if self.phase != "parsing" or not self.parse_started_at:
+            return None
+        done = self.parsed + self.failed
+        elapsed = time.monotonic() - self.parse_started_at
+        if not done or elapsed <= 0:
+            return None
+        return max(self.queued - done, 0) / (done / elapsed)
+
+    def snapshot(self):
+        end = self.finished_at or time.monotonic()
+        eta = self.eta_seconds()
+        return {
+            "phase": self.phase,
+            "files_seen": self.seen,
+            "files_queued": self.queued,
+            "files_parsed": self.parsed,
+            "files_failed": self.failed,
+            "added_tracks": self.added,
+            "updated_tracks": self.updated,
+            "removed_tracks": self.removed,
+            "elapsed_seconds": round(end - self.started_at, 1) if self.started_at else 0.0,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+
+def _is_under(path: str, root_dir: str):
+    root = os.path.join(os.path.abspath(root_dir), '')
+    return os.path.abspath(path).startswith(root)
+
+def scan_library(db: Session, directory: str = None, workers: int = None, full: bool = False, prune: bool = True, progress: ScanProgress = None, budget: IOBudget = None, since: datetime = None):
+    # since: yarıda kalan job'un başladığı an. o andan sonra okunmuş ve o zamandan beri
+    # değişmemiş dosyalar tam taramada da tekrar okunmaz
+    progress = progress or ScanProgress()
+    budget = budget or IOBudget()
     root_dir = directory or settings.MUSIC_DIRECTORY
     if not os.path.exists(root_dir):
         print(f"Directory not found: {root_dir}")
+        progress.phase = "error"
         return {"status": "error", "message": "Directory not found"}
 
-    scan_count = 0
-    
+    workers = resolve_workers(workers)
+    started = time.perf_counter()
+    progress.started_at = time.monotonic()
+    progress.phase = "walking"
+    known = load_fingerprints(db)
+    done = {path for (path,) in db.query(Track.file_path).filter(Track.scanned_at >= since)} if full and since else set()
+    # okuma işlemini kapat: tek yazıcı bağlantısı dosya taraması boyunca tutulmasın
+    db.commit()
+    seen = set()
+    pending = []
+    unchanged = 0
+
     for root, dirs, files in os.walk(root_dir):
-        cover_image = None
-        for img in ['cover.jpg', 'album.jpg']:
-            if img in files:
-                cover_image = os.path.join(root, img)
-                break
+        if progress.cancelled:
+            break
+        if progress.checkpoint_due():
+            progress.checkpoint()
+        cover_image = find_folder_cover(root, files)
 
         for file in files:
             ext = os.path.splitext(file)[1].lower()
             if ext in SUPPORTED_EXTENSIONS:
                 file_path = os.path.join(root, file)
-                
-                existing_track = db.query(Track).filter(Track.file_path == file_path).first()
-                if existing_track:
-                    continue
-                
+                seen.add(file_path)
+                progress.seen += 1
+
                 try:
-                    process_file(db, file_path, cover_image)
-                    scan_count += 1
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+                    fingerprint = file_fingerprint(file_path)
+                except OSError:
+                    continue
 
-    db.commit()
-    return {"status": "success", "added_tracks": scan_count}
+                existing = known.get(file_path)
+                if existing and existing[1] == fingerprint and (not full or file_path in done):
+                    unchanged += 1
+                    continue
 
-def process_file(db: Session, file_path: str, folder_cover_path: str = None):
+                pending.append((file_path, cover_image, fingerprint, existing[0] if existing else None))
+
+    writer = LibraryWriter(db)
+    # yarıda kesilen taramada görülmeyen dosyalar silinmiş sayılmaz
+    if prune and not progress.cancelled:
+        vanished = [track_id for path, (track_id, _) in known.items() if path not in seen and _is_under(path, root_dir)]
+        writer.remove(vanished)
+
+    failed = 0
+    jobs = {file_path: (cover, fingerprint, track_id) for file_path, cover, fingerprint, track_id in pending}
+    progress.queued = len(pending)
+    progress.parse_started_at = time.monotonic()
+    progress.phase = "parsing"
+
+    def throttle(paths):
+        budget.wait(len(paths), sum(jobs[path][1][0] for path in paths), progress)
+
+    paths = [p[0] for p in pending]
+    for file_path, meta, error, seconds in ([] if progress.cancelled else iter_metadata(paths, workers, throttle if budget.limited else None)):
+        if progress.cancelled:
+            break
+        metrics.scan_parse_duration.observe(seconds)
+        if error:
+            print(f"Failed to read metadata for {file_path}: {error}")
+            failed += 1
+            progress.failed += 1
+            metrics.scan_files.inc(labels=("failed",))
+            continue
+        progress.parsed += 1
+        metrics.scan_files.inc(labels=("parsed",))
+        if not meta:
+            continue
+        cover, fingerprint, track_id = jobs[file_path]
+        writer.add(meta, cover, fingerprint, track_id)
+        if progress.checkpoint_due():
+            # checkpoint'e kadar okunanlar db'de: kesilirse bunlar parmak iziyle atlanır
+            writer.flush()
+            progress.checkpoint(writer)
+
+    writer.close()
+    progress.phase = "cancelled" if progress.cancelled else "done"
+    progress.finished_at = time.monotonic()
+    progress.checkpoint(writer)
+    thumbnails.schedule(writer.take_cover_hashes())
+    added, updated, removed = writer.added, writer.updated, writer.removed
+    failed += writer.failed
+    elapsed = time.perf_counter() - started
+    parsed = added + updated
+    rate = parsed / elapsed if elapsed > 0 else 0.0
+    metrics.scan_files.inc(unchanged, ("unchanged",))
+    metrics.scan_runs.inc(labels=("cancelled" if progress.cancelled else "done",))
+    metrics.scan_rate.set(rate)
+    print(f"Scan {'cancelled' if progress.cancelled else 'finished'}: +{added} ~{updated} -{removed} ({unchanged} unchanged) in {elapsed:.1f}s ({rate:.1f} tracks/s, {workers} workers)")
+    return {
+        "status": "cancelled" if progress.cancelled else "success",
+        "added_tracks": added,
+        "updated_tracks": updated,
+        "removed_tracks": removed,
+        "unchanged_tracks": unchanged,
+        "failed": failed,
+        "transactions": writer.transactions,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "tracks_per_sec": round(rate, 1),
+    }
+
+# etiketler easy=True ile ikinci kez ayrıştırmadan ham nesneden okunur;
+# aynı nesne kapak çıkarmaya da verilir, dosya tarama başına bir kez parse edilir
+_ID3_KEYS = {"artist": "TPE1", "album": "TALB", "title": "TIT2", "date": "TDRC", "genre": "TCON", "tracknumber": "TRCK"}
+_MP4_KEYS = {"artist": "\xa9ART", "album": "\xa9alb", "title": "\xa9nam", "date": "\xa9day", "genre": "\xa9gen", "tracknumber": "trkn"}
+
+def _tag(tags, key: str, default: str):
+    if not tags:
+        return default
+    if isinstance(tags, ID3):
+        frame = tags.get(_ID3_KEYS[key])
+        if frame is None:
+            return default
+        # easy id3 ile aynı: tür numaraları (ör. "(17)") isme çevrilir
+        values = frame.genres if key == "genre" else frame.text
+        return str(values[0]) if values else default
+    if isinstance(tags, MP4Tags):
+        values = tags.get(_MP4_KEYS[key])
+        if not values:
+            return default
+        if key == "tracknumber":
+            number, total = values[0]
+            return f"{number}/{total}" if total else str(number)
+        return str(values[0])
+    # vorbis yorumları (flac, ogg): anahtarlar zaten küçük harf
+    values = tags.get(key)
+    return values[0] if values else default
+
+def read_metadata(file_path: str):
+    audio = mutagen.File(file_path)
+    if not audio:
+        return None
+
+    tags = audio.tags
+    track_number = _tag(tags, 'tracknumber', '0')
     try:
-        audio = mutagen.File(file_path, easy=True)
-        if not audio:
-            return
+        track_num = int(track_number.split('/')[0]) if '/' in track_number else int(track_number)
+    except:
+        track_num = 0
 
-        artist_name = audio.get('artist', ['Belirsiz Sanatçı'])[0]
-        album_title = audio.get('album', ['Belirsiz Albüm'])[0]
-        title = audio.get('title', [os.path.basename(file_path)])[0]
-        date = audio.get('date', [''])[0]
-        genre = audio.get('genre', [''])[0]
-        track_number = audio.get('tracknumber', ['0'])[0]
-        
+    return {
+        "file_path": file_path,
+        "artist": _tag(tags, 'artist', 'Belirsiz Sanatçı'),
+        "album": _tag(tags, 'album', 'Belirsiz Albüm'),
+        "title": _tag(tags, 'title', os.path.basename(file_path)),
+        "year": _tag(tags, 'date', ''),
+        "genre": _tag(tags, 'genre', ''),
+        "track_number": track_num,
+        "duration": audio.info.length if audio.info else 0,
+        "cover_hash": covers.extract(file_path, audio),
+        **dict(zip(("seek_method", "seek_index"), seek.build(file_path))),
+    }
+
+def _read_metadata_chunk(paths):
+    # worker process tarafı: sadece düz dict/str döner, pickle edilebilsin.
+    # süre de dönüyor, metrikler ana process'te tutuluyor
+    results = []
+    for file_path in paths:
+        started = time.perf_counter()
         try:
-            track_num = int(track_number.split('/')[0]) if '/' in track_number else int(track_number)
-        except:
-            track_num = 0
-            
-        duration = audio.info.length if audio.info else 0
-
-        artist = db.query(Artist).filter(Artist.name == artist_name).first()
-        if not artist:
-            artist = Artist(name=artist_name)
-            db.add(artist)
-            db.flush()
-
-        album = db.query(Album).filter(Album.title == album_title, Album.artist_id == artist.id).first()
-        if not album:
-            album = Album(title=album_title, artist_id=artist.id, year=date, cover_image_path=folder_cover_path)
-            db.add(album)
-            db.flush()
-        
-        if album and not album.cover_image_path and folder_cover_path:
-             album.cover_image_path = folder_cover_path
-
-        track = Track(
-            title=title,
-            file_path=file_path,
-            duration=duration,
-            track_number=track_num,
-            genre=genre,
-            album_id=album.id,
-            artist_id=artist.id
-        )
+            results.append((file_path, read_metadata(file_path), None, time.perf_counter() - started))
+        except Exception as e:
+            results.append((file_path, None, str(e), time.perf_counter() - started))
+    return results
+
+def iter_metadata(paths, workers: int = 1, throttle=None):
+    # throttle(paths): okumadan önce çağrılır, bütçe doluysa bekletir
+    if workers <= 1 or len(paths) <= settings.SCAN_CHUNK_SIZE:
+        # tek tek: ilerleme ve iptal dosya başına işlesin
+        for file_path in paths:
+            if throttle:
+                throttle([file_path])
+            yield from _read_metadata_chunk([file_path])
+        return
+
+    chunk_size = settings.SCAN_CHUNK_SIZE
+    chunks = (paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size))
+    # spawn: sunucu çok thread'li (watcher, yazıcı, thumbnail havuzu); fork kilitli bir
+    # kilidi çocuğa kopyalayıp onu kilitleyebilir. çocuklar modülleri temiz import eder
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        try:
+            in_flight = deque()
+            for chunk in chunks:
+                if throttle:
+                    throttle(chunk)
+                in_flight.append(pool.submit(_read_metadata_chunk, chunk))
+                # sonuçlar tek yazıcıya sırayla akar, kuyrukta en fazla workers*2 parça bekler
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+        finally:
+            # tarama iptal edildiyse kuyrukta bekleyen parçalar hiç başlamasın
+            pool.shutdown(wait=False, cancel_futures=True)
+
+def store_metadata(db: Session, meta: dict, folder_cover_path: str = None, fingerprint=None, track_id: int = None):
+    artist = db.query(Artist).filter(Artist.name == meta["artist"]).first()
+    if not artist:
+        artist = Artist(name=meta["artist"])
+        db.add(artist)
+        db.flush()
+
+    album_cover_hash = (covers.import_file(folder_cover_path) if folder_cover_path else None) or meta.get("cover_hash")
+    album = db.query(Album).filter(Album.title == meta["album"], Album.artist_id == artist.id).first()
+    if not album:
+        album = Album(title=meta["album"], artist_id=artist.id, year=meta["year"], cover_image_path=folder_cover_path, cover_hash=album_cover_hash, has_cover=bool(folder_cover_path or album_cover_hash))
+        db.add(album)
+        db.flush()
+
+    if album and not album.cover_image_path and folder_cover_path:
+         album.cover_image_path = folder_cover_path
+         album.has_cover = True
+
+    if album and not album.cover_hash and album_cover_hash:
+        album.cover_hash = album_cover_hash
+        album.has_cover = True
+
+    track = db.get(Track, track_id) if track_id else None
+    if not track:
+        track = Track(file_path=meta["file_path"])
         db.add(track)
-        db.commit() 
-        
+
+    track.title = meta["title"]
+    track.duration = meta["duration"]
+    track.track_number = meta["track_number"]
+    track.genre = meta["genre"]
+    track.cover_hash = meta.get("cover_hash")
+    track.seek_method = meta.get("seek_method")
+    track.seek_index = meta.get("seek_index")
+    track.album_id = album.id
+    track.artist_id = artist.id
+    track.scanned_at = datetime.utcnow()
+    if fingerprint:
+        track.file_size, track.file_mtime, track.file_inode = fingerprint
+    return track
+
+def process_file(db: Session, file_path: str, folder_cover_path: str = None):
+    sync_file(db, file_path, folder_cover_path, force=True)
+
+def sync_file(db: Session, file_path: str, folder_cover_path: str = None, force: bool = False):
+    # watcher tarafı: tek dosya için scan_library ile aynı parmak izi kontrolü
+    try:
+        try:
+            fingerprint = file_fingerprint(file_path)
+        except OSError:
+            return remove_file(db, file_path)
+
+        existing = db.query(Track.id, Track.file_size, Track.file_mtime, Track.file_inode, Track.cover_hash).filter(Track.file_path == file_path).first()
+        if existing and not force and existing.cover_hash is not None and tuple(existing[1:4]) == fingerprint:
+            return
+
+        with metrics.timed(metrics.scan_parse_duration):
+            meta = read_metadata(file_path)
+        if not meta:
+            return
+
+        if folder_cover_path is None:
+            folder_cover_path = find_folder_cover(os.path.dirname(file_path))
+        track = store_metadata(db, meta, folder_cover_path, fingerprint, existing[0] if existing else None)
+        db.commit()
+        versions.bump_library()
+        search_index.index.upsert(track.id, meta["artist"], meta["title"], meta["album"])
+
     except Exception as e:
+        db.rollback()
         print(f"Failed to read metadata for {file_path}: {e}")
 
 def remove_file(db: Session, file_path: str):
@@ -98,6 +427,9 @@ def remove_file(db: Session, file_path: str):
     if track:
         db.delete(track)
         db.commit()
+        versions.bump_library()
+        search_index.index.remove(track.id)
         print(f"Removed track: {file_path}")
 
 
+
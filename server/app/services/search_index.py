@@ -0,0 +1,185 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from rapidfuzz import process, fuzz, utils
+from sqlalchemy.orm import Session
+from app.models.music import Track, Artist, Album
+from app.core.config import settings
+
+def normalize(text: str):
+    return utils.default_process(text or "")
+
+def trigrams(token: str):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    # bellekte duran arama indeksi:
+    #   slot -> (track id, normalize edilmiş "artist title album") dizileri
+    #   kelime -> slot postings (array), trigram -> kelime (yazım hatası toleransı)
+    # silinen/güncellenen kayıtlar tombstone olur, oran büyüyünce indeks sıkıştırılır.
+    # build ve sıkıştırma yeni kopyayı kilit dışında kurar, aramalar sadece takas anında bekler
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._journal = None
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self.ids = array('q')
+        self.texts = []
+        self.slots = {}
+        self.postings = {}
+        self.grams = {}
+        # sıralı kelime listesi (önek araması için), eklemede sıralı tutulur
+        self._vocab = []
+        self._dead = 0
+
+    @staticmethod
+    def _fresh(entries):
+        # toplu kurulum: kelimeler sona eklenip bir kez sıralanır
+        fresh = SearchIndex()
+        for track_id, text in entries:
+            fresh._insert(track_id, text, bulk=True)
+        fresh._vocab.sort()
+        return fresh
+
+    def _swap(self, fresh):
+        with self._lock:
+            # kurulum sürerken gelen yazıları yeni indekse uygula
+            journal, self._journal = self._journal, None
+            for name in ("ids", "texts", "slots", "postings", "grams", "_vocab", "_dead"):
+                setattr(self, name, getattr(fresh, name))
+            for args in journal:
+                self._apply(*args)
+
+    def build(self, db: Session):
+        rows = db.query(Track.id, Artist.name, Track.title, Album.title).outerjoin(
+            Artist, Track.artist_id == Artist.id
+        ).outerjoin(Album, Track.album_id == Album.id)
+
+        with self._rebuild_lock:
+            with self._lock:
+                self._journal = []
+            self._swap(self._fresh(
+                (track_id, f"{artist or ''} {title or ''} {album or ''}") for track_id, artist, title, album in rows
+            ))
+            self.ready = True
+        print(f"Search index built: {len(self.slots)} tracks, {len(self.postings)} terms")
+
+    @property
+    def active(self):
+        # build sürerken de yazılar journal'a düşsün
+        return self.ready or self._journal is not None
+
+    def upsert(self, track_id: int, artist: str, title: str, album: str):
+        self._apply(track_id, f"{artist or ''} {title or ''} {album or ''}")
+        self._maybe_compact()
+
+    def remove(self, track_id: int):
+        self._apply(track_id, None)
+        self._maybe_compact()
+
+    def _apply(self, track_id: int, text):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((track_id, text))
+            self._delete(track_id)
+            if text is not None:
+                self._insert(track_id, text)
+
+    def _insert(self, track_id: int, text: str, bulk: bool = False):
+        normalized = normalize(text)
+        slot = len(self.ids)
+        self.ids.append(track_id)
+        self.texts.append(normalized)
+        self.slots[track_id] = slot
+        for token in set(normalized.split()):
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = array('i')
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(token)
+                if bulk:
+                    self._vocab.append(token)
+                else:
+                    insort(self._vocab, token)
+            posting.append(slot)
+
+    def _delete(self, track_id: int):
+        slot = self.slots.pop(track_id, None)
+        if slot is not None:
+            self.texts[slot] = None
+            self._dead += 1
+
+    def _maybe_compact(self):
+        if not (self._dead > 1000 and self._dead > len(self.slots)):
+            return
+        # build ya da başka bir sıkıştırma sürüyorsa onun sonucu yeterli
+        if not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                live = [(self.ids[slot], self.texts[slot]) for slot in sorted(self.slots.values())]
+                self._journal = []
+            self._swap(self._fresh(live))
+        finally:
+            self._rebuild_lock.release()
+
+    def _similar_tokens(self, token: str):
+        # yazarken: önek eşleşmeleri
+        matches = set()
+        i = bisect_left(self._vocab, token)
+        while i < len(self._vocab) and self._vocab[i].startswith(token) and len(matches) < settings.SEARCH_MAX_TERMS:
+            matches.add(self._vocab[i])
+            i += 1
+
+        # yazım hatası: trigramların en az yarısını paylaşan kelimeler
+        if len(token) >= 3:
+            query_grams = trigrams(token)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self.grams.get(gram, ()))
+            needed = max(1, len(query_grams) // 2)
+            for term, count in shared.most_common(settings.SEARCH_MAX_TERMS):
+                if count < needed:
+                    break
+                matches.add(term)
+        return matches
+
+    def candidates(self, query: str, exclude=()):
+        found = {}
+        with self._lock:
+            for token in set(query.split()):
+                for term in self._similar_tokens(token):
+                    for slot in self.postings[term]:
+                        text = self.texts[slot]
+                        if text is None:
+                            continue
+                        track_id = self.ids[slot]
+                        if track_id in exclude:
+                            continue
+                        found[track_id] = text
+                        if len(found) >= settings.SEARCH_MAX_CANDIDATES:
+                            return found
+        return found
+
+    def search(self, query: str, limit: int, exclude=(), score_cutoff: float = 60):
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+        candidates = self.candidates(query, exclude)
+        if not candidates:
+            return []
+        results = process.extract(
+            query,
+            candidates,
+            limit=limit,
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=score_cutoff
+        )
+        return [res[2] for res in results if res[1] > score_cutoff]
+
+index = SearchIndex()
@@ -0,0 +1,526 @@
+import os
+import re
+import mmap
+import struct
+from array import array
+from app.core.config import settings
+
+# zaman -> byte offset seek indeksi. tarama sırasında bir kez çıkarılır:
+#   flac: SEEKTABLE, yoksa frame taraması
+#   mp3: Xing/Info TOC, VBRI tablosu, sabit bitrate ise doğrusal, değilse frame taraması
+#   wav: PCM, doğrudan hesap
+# indeks (saniye, offset) çiftleridir; çözerken dosyadan birkaç frame okunup
+# offset frame başına hizalanır.
+
+class SeekUnsupported(Exception):
+    pass
+
+class _OutsideWindow(Exception):
+    pass
+
+# build'de önce sadece başlık bölgesi okunur; bu kadarı yetmezse tüm dosya açılır
+WINDOW_BUDGET = 1024 * 1024
+_BLOCK = 64 * 1024
+
+class _Window:
+    # dosyanın sadece dokunulan 64 KiB blokları okunur: toc / seektable / cbr / pcm başlıkları ve
+    # mp3'ün ID3v1 kuyruğu birkaç blok. frame taraması (ya da bütçe aşımı) _OutsideWindow atar
+    def __init__(self, file, size: int):
+        self.file = file
+        self.size = size
+        self.blocks = {}
+        self.read_bytes = 0
+
+    def __len__(self):
+        return self.size
+
+    def _block(self, index: int):
+        block = self.blocks.get(index)
+        if block is None:
+            if self.read_bytes >= WINDOW_BUDGET:
+                raise _OutsideWindow()
+            self.file.seek(index * _BLOCK)
+            block = self.blocks[index] = self.file.read(_BLOCK)
+            self.read_bytes += len(block)
+        return block
+
+    def _range(self, start: int, stop: int):
+        if start >= stop:
+            return b""
+        first = start // _BLOCK
+        data = b"".join(self._block(i) for i in range(first, (stop - 1) // _BLOCK + 1))
+        return data[start - first * _BLOCK:stop - first * _BLOCK]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(self.size)
+            return self._range(start, stop)
+        if key < 0:
+            key += self.size
+        if not 0 <= key < self.size:
+            raise IndexError("window index out of range")
+        return self._block(key // _BLOCK)[key % _BLOCK]
+
+    def find(self, sub: bytes, start: int, end: int):
+        found = self._range(start, min(end, self.size)).find(sub)
+        return start + found if found >= 0 else -1
+
+def _whole(data):
+    # frame taraması tüm dosyayı gezer: pencerede başlamadan vazgeç
+    if isinstance(data, _Window):
+        raise _OutsideWindow()
+
+# indeks çıkarıldıktan sonra değişmiş / kısalmış dosyada resolve bunlardan birini atabilir
+RESOLVE_ERRORS = (SeekUnsupported, ValueError, IndexError, struct.error)
+
+# bu yöntemlerde noktalar tam frame başı ve zamanı kesin; diğerleri (toc/cbr) tahmini
+EXACT_METHODS = {"seektable", "framescan", "pcm"}
+
+def encode(points):
+    flat = array("d")
+    for seconds, offset in points:
+        flat.append(seconds)
+        flat.append(offset)
+    return flat.tobytes()
+
+def decode(blob: bytes):
+    flat = array("d")
+    flat.frombytes(blob)
+    return [(flat[i], int(flat[i + 1])) for i in range(0, len(flat), 2)]
+
+def _thin(points, interval: float):
+    # frame taramasında her frame değil, `interval` saniyede bir nokta saklanır
+    kept = []
+    for seconds, offset in points:
+        if not kept or seconds - kept[-1][0] >= interval:
+            kept.append((seconds, offset))
+    return kept
+
+def _skip_id3(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+# --- mp3 ---
+
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+_MP3_VERSIONS = {0: 25, 2: 2, 3: 1}
+
+def mp3_frame(data, pos: int):
+    # (frame uzunluğu, frame başına örnek, sample rate, version, mono) ya da geçersizse None
+    if pos + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = _MP3_VERSIONS.get((b1 >> 3) & 3)
+    layer = 4 - ((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version is None or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples, sample_rate, version, (b3 >> 6) == 3
+
+def mp3_sync(data, pos: int, limit: int = 64 * 1024):
+    # pos'tan itibaren art arda iki geçerli frame'in başladığı ilk offset
+    end = min(len(data), pos + limit)
+    while pos < end:
+        pos = data.find(b"\xff", pos, end)
+        if pos < 0:
+            return None
+        frame = mp3_frame(data, pos)
+        if frame:
+            following = mp3_frame(data, pos + frame[0])
+            if (following and following[2] == frame[2]) or pos + frame[0] >= len(data):
+                return pos
+        pos += 1
+    return None
+
+def _audio_end(data):
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    return end
+
+def _mp3_index(data):
+    first = mp3_sync(data, _skip_id3(data))
+    if first is None:
+        raise SeekUnsupported("no mpeg frames found")
+    length, samples, sample_rate, version, mono = mp3_frame(data, first)
+    frame_seconds = samples / sample_rate
+
+    # Xing / Info başlığı ilk frame'in side info'sundan sonra
+    if version == 1:
+        side = 17 if mono else 32
+    else:
+        side = 9 if mono else 17
+    tag_pos = first + 4 + side
+    tag = data[tag_pos:tag_pos + 4]
+    if tag in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[tag_pos + 4:tag_pos + 8])[0]
+        cursor = tag_pos + 8
+        frames = total_bytes = None
+        if flags & 1:
+            frames = struct.unpack(">I", data[cursor:cursor + 4])[0]
+            cursor += 4
+        if flags & 2:
+            total_bytes = struct.unpack(">I", data[cursor:cursor + 4])[0]
+            cursor += 4
+        audio_start = first + length
+        if frames and total_bytes and flags & 4 and tag == b"Xing":
+            toc = data[cursor:cursor + 100]
+            duration = frames * frame_seconds
+            points = [(duration * i / 100, first + toc[i] * total_bytes // 256) for i in range(100)]
+            points[0] = (0.0, audio_start)
+            points.append((duration, min(first + total_bytes, len(data))))
+            return "xing", points
+        if tag == b"Info":
+            return _mp3_cbr(data, audio_start)
+
+    # VBRI (Fraunhofer) ilk frame başından 32 byte sonra
+    vbri = first + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        _, _, _, total_bytes, frames, entries, scale, entry_size, frames_per_entry = struct.unpack(
+            ">HHHIIHHHH", data[vbri + 4:vbri + 26]
+        )
+        fmt = {1: ">B", 2: ">H", 3: None, 4: ">I"}.get(entry_size)
+        if fmt and frames:
+            points = [(0.0, first + length)]
+            offset = first
+            cursor = vbri + 26
+            for i in range(entries):
+                raw = data[cursor:cursor + entry_size]
+                cursor += entry_size
+                offset += struct.unpack(fmt, raw)[0] * scale
+                points.append(((i + 1) * frames_per_entry * frame_seconds, offset))
+            duration = frames * frame_seconds
+            return "vbri", [(s, o) for s, o in points if s <= duration]
+
+    # başlık yok: ilk frame'lerin bitrate'i sabitse doğrusal
+    pos = first
+    lengths = set()
+    for _ in range(32):
+        frame = mp3_frame(data, pos)
+        if not frame:
+            break
+        lengths.add(frame[0] - (data[pos + 2] >> 1 & 1))
+        pos += frame[0]
+    if len(lengths) == 1:
+        return _mp3_cbr(data, first)
+    return "framescan", _mp3_scan(data, first)
+
+def _mp3_cbr(data, audio_start: int):
+    start = mp3_sync(data, audio_start) or audio_start
+    length, samples, sample_rate, _, _ = mp3_frame(data, start)
+    padding = data[start + 2] >> 1 & 1
+    # padding'siz frame uzunluğu ve frame süresinden byte/saniye
+    bytes_per_second = (length - padding) * sample_rate / samples
+    end = _audio_end(data)
+    return "cbr", [(0.0, start), ((end - start) / bytes_per_second, end)]
+
+def _mp3_scan(data, start: int):
+    _whole(data)
+    points = []
+    pos = start
+    seconds = 0.0
+    end = _audio_end(data)
+    while pos < end:
+        frame = mp3_frame(data, pos)
+        if not frame:
+            pos = mp3_sync(data, pos + 1, end - pos)
+            if pos is None:
+                break
+            continue
+        points.append((seconds, pos))
+        seconds += frame[1] / frame[2]
+        pos += frame[0]
+    points = _thin(points, settings.SEEK_INDEX_INTERVAL)
+    points.append((seconds, min(pos, end)))
+    return points
+
+def _mp3_refine(data, method: str, points, seconds: float):
+    index = _bracket(points, seconds)
+    start_s, start_off = points[index]
+    if method in EXACT_METHODS:
+        # kesin noktadan frame frame ilerle
+        pos = start_off
+        while True:
+            frame = mp3_frame(data, pos)
+            if not frame:
+                break
+            duration = frame[1] / frame[2]
+            if start_s + duration > seconds or pos + frame[0] >= len(data):
+                break
+            start_s += duration
+            pos += frame[0]
+        return start_s, pos
+
+    # toc / cbr: araya doğrusal tahmin, sonra ilk geçerli frame'e hizala
+    _, offset = _interpolate(points, index, seconds)
+    if offset > len(data):
+        # indeks çıkarıldıktan sonra kısalmış dosya: baştan çalmak yerine hata
+        raise SeekUnsupported("seek index points past the end of the file")
+    pos = mp3_sync(data, offset)
+    if pos is None:
+        # son frame'den sonrası: flac'taki gibi dosya sonu (yayın 416 döner)
+        return start_s, len(data)
+    return _time_at(points, index, pos), pos
+
+# --- flac ---
+
+_FLAC_BLOCK_SIZES = {1: 192, 2: 576, 3: 1152, 4: 2304, 5: 4608}
+_FLAC_SYNC = re.compile(b"\xff[\xf8\xf9]")
+
+def _crc8(data):
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+def flac_frame(data, pos: int):
+    # (ilk örnek/frame numarası, değişken blok mu) ya da geçersizse None
+    header = data[pos:pos + 16]
+    if len(header) < 6 or header[0] != 0xFF or header[1] & 0xFE != 0xF8:
+        return None
+    block_code, rate_code = header[2] >> 4, header[2] & 0x0F
+    channels, sample_size = header[3] >> 4, (header[3] >> 1) & 7
+    if block_code == 0 or rate_code == 15 or channels > 10 or sample_size == 3 or header[3] & 1:
+        return None
+
+    # utf-8 benzeri kodlanmış frame / örnek numarası
+    first = header[4]
+    if first < 0x80:
+        number, extra = first, 0
+    elif first >= 0xFE:
+        number, extra = 0, 6
+    else:
+        extra = 0
+        mask = 0x40
+        while first & mask:
+            extra += 1
+            mask >>= 1
+        if extra == 0 or extra > 5:
+            return None
+        number = first & (mask - 1)
+    cursor = 5
+    for _ in range(extra):
+        if cursor >= len(header) or header[cursor] & 0xC0 != 0x80:
+            return None
+        number = (number << 6) | (header[cursor] & 0x3F)
+        cursor += 1
+
+    cursor += {6: 1, 7: 2}.get(block_code, 0)
+    cursor += {12: 1, 13: 2, 14: 2}.get(rate_code, 0)
+    if cursor >= len(header) or _crc8(header[:cursor]) != header[cursor]:
+        return None
+    return number, bool(header[1] & 1)
+
+def _flac_info(data):
+    pos = _skip_id3(data)
+    if data[pos:pos + 4] != b"fLaC":
+        raise SeekUnsupported("not a flac stream")
+    pos += 4
+    info = None
+    seektable = []
+    while True:
+        block_type, length = data[pos] & 0x7F, int.from_bytes(data[pos + 1:pos + 4], "big")
+        last = data[pos] & 0x80
+        # sadece STREAMINFO ve SEEKTABLE okunur; gömülü kapak gibi büyük bloklar atlanır
+        body = data[pos + 4:pos + 4 + length] if block_type in (0, 3) else None
+        if block_type == 0:
+            block_size = struct.unpack(">H", body[2:4])[0]
+            packed = int.from_bytes(body[10:18], "big")
+            info = (block_size, packed >> 44, packed & 0xFFFFFFFFF)
+        elif block_type == 3:
+            for i in range(0, length - length % 18, 18):
+                sample, offset, _ = struct.unpack(">QQH", body[i:i + 18])
+                if sample != 0xFFFFFFFFFFFFFFFF:
+                    seektable.append((sample, offset))
+        pos += 4 + length
+        if last:
+            break
+    if not info or not info[1]:
+        raise SeekUnsupported("missing STREAMINFO")
+    return info, seektable, pos
+
+def _flac_frames(data, start: int, block_size: int, end: int = None):
+    # start'tan itibaren (örnek, offset); numarası önceki frame'le tutmayan eşleşmeler atlanır
+    expected = None
+    for match in _FLAC_SYNC.finditer(data, start, end or len(data)):
+        frame = flac_frame(data, match.start())
+        if not frame:
+            continue
+        number, variable = frame
+        sample = number if variable else number * block_size
+        if expected is not None and not (expected < sample <= expected + 65536):
+            continue
+        expected = sample
+        yield sample, match.start()
+
+def _flac_index(data):
+    (block_size, sample_rate, total), seektable, first = _flac_info(data)
+    if seektable:
+        points = [(sample / sample_rate, first + offset) for sample, offset in seektable]
+        if points[0][1] != first:
+            points.insert(0, (0.0, first))
+        return "seektable", points
+
+    _whole(data)
+    points = _thin(
+        ((sample / sample_rate, offset) for sample, offset in _flac_frames(data, first, block_size)),
+        settings.SEEK_INDEX_INTERVAL
+    )
+    if not points:
+        raise SeekUnsupported("no flac frames found")
+    return "framescan", points
+
+def _flac_refine(data, points, seconds: float):
+    (block_size, sample_rate, total), _, _ = _flac_info(data)
+    target = seconds * sample_rate
+    if target >= total:
+        return total / sample_rate, len(data)
+    index = _bracket(points, seconds)
+    best = points[index]
+    for sample, offset in _flac_frames(data, best[1], block_size):
+        if sample > target:
+            break
+        best = (sample / sample_rate, offset)
+    return best
+
+# --- wav ---
+
+def _wav_info(data):
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise SeekUnsupported("not a wav file")
+    pos = 12
+    fmt = None
+    while pos + 8 <= len(data):
+        chunk, length = data[pos:pos + 4], struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        if chunk == b"fmt ":
+            _, _, sample_rate, _, block_align = struct.unpack("<HHIIH", data[pos + 8:pos + 22])
+            fmt = (sample_rate, block_align)
+        elif chunk == b"data":
+            if not fmt:
+                break
+            return fmt, pos + 8, min(length, len(data) - pos - 8)
+        pos += 8 + length + (length & 1)
+    raise SeekUnsupported("missing fmt/data chunk")
+
+def _wav_index(data):
+    (sample_rate, block_align), start, length = _wav_info(data)
+    return "pcm", [(0.0, start), (length / block_align / sample_rate, start + length)]
+
+def _wav_refine(data, seconds: float):
+    (sample_rate, block_align), start, length = _wav_info(data)
+    frames = length // block_align
+    frame = int(seconds * sample_rate)
+    if frame >= frames:
+        # ses verisinin sonrası (arkada id3/list chunk'ı olabilir): dosya sonu
+        return frames / sample_rate, len(data)
+    return frame / sample_rate, start + frame * block_align
+
+# --- ortak ---
+
+_BUILDERS = {".mp3": _mp3_index, ".flac": _flac_index, ".wav": _wav_index}
+
+def _bracket(points, seconds: float):
+    # seconds'tan küçük/eşit son nokta
+    lo, hi = 0, len(points) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if points[mid][0] <= seconds:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _interpolate(points, index: int, seconds: float):
+    start_s, start_off = points[index]
+    if index + 1 >= len(points):
+        return start_s, start_off
+    end_s, end_off = points[index + 1]
+    if end_s <= start_s:
+        return start_s, start_off
+    ratio = (seconds - start_s) / (end_s - start_s)
+    return seconds, int(start_off + ratio * (end_off - start_off))
+
+def _time_at(points, index: int, offset: int):
+    start_s, start_off = points[index]
+    if index + 1 >= len(points):
+        return start_s
+    end_s, end_off = points[index + 1]
+    if end_off <= start_off:
+        return start_s
+    return start_s + (offset - start_off) / (end_off - start_off) * (end_s - start_s)
+
+def _open(file_path: str):
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SeekUnsupported("empty file")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def supported(file_path: str):
+    return os.path.splitext(file_path)[1].lower() in _BUILDERS
+
+def build(file_path: str):
+    # (yöntem, sıkıştırılmış noktalar); desteklenmeyen / okunamayan dosyada ("", None)
+    builder = _BUILDERS.get(os.path.splitext(file_path)[1].lower())
+    if not builder:
+        return "", None
+    try:
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                raise SeekUnsupported("empty file")
+            try:
+                method, points = builder(_Window(f, size))
+            except _OutsideWindow:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    method, points = builder(data)
+                finally:
+                    data.close()
+    except (SeekUnsupported, OSError, ValueError, IndexError, struct.error) as e:
+        print(f"No seek index for {file_path}: {e}")
+        return "", None
+    return method, encode(points)
+
+def resolve(file_path: str, method: str, points, seconds: float):
+    # (gerçek başlangıç zamanı, frame başı byte offset)
+    seconds = max(0.0, seconds)
+    ext = os.path.splitext(file_path)[1].lower()
+    data = _open(file_path)
+    try:
+        if ext == ".flac":
+            found = _flac_refine(data, points, seconds)
+        elif ext == ".wav":
+            found = _wav_refine(data, seconds)
+        else:
+            found = _mp3_refine(data, method, points, seconds)
+        if found[1] > len(data):
+            raise SeekUnsupported("seek index points past the end of the file")
+        return found
+    finally:
+        data.close()
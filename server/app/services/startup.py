@@ -0,0 +1,38 @@
+import os
+import threading
+from app.core.config import settings
+from app.db.session import SessionLocal, ReadSessionLocal
+from app.services import search_index, scan_jobs
+
+# açılış: port mevcut db ile hemen açılır, uzlaştırma taraması arka planda bir scan job'ı olarak koşar.
+# tarama bitmeden de istekler cevaplanır, ilerleme /health/ready'den izlenir
+
+job_id = None
+_thread = None
+
+def _build_index():
+    # arama indeksi önce mevcut kayıtlardan; taramanın yazdıkları üstüne işlenir
+    db = ReadSessionLocal()
+    try:
+        search_index.index.build(db)
+    finally:
+        db.close()
+
+def start():
+    global job_id, _thread
+    _thread = threading.Thread(target=_build_index, name="search-index", daemon=True)
+    _thread.start()
+
+    # yarıda kalmış job'lar önce kuyruğa girer; aynı klasör için yenisi açılmaz
+    scan_jobs.start()
+    if settings.STARTUP_SCAN and os.path.exists(settings.MUSIC_DIRECTORY):
+        db = SessionLocal()
+        try:
+            job, _ = scan_jobs.create_job(db, settings.MUSIC_DIRECTORY)
+            job_id = job.id
+        finally:
+            db.close()
+
+def stop():
+    # yarıda kalan tarama bir sonraki açılışta kaldığı yerden devam eder
+    scan_jobs.stop()
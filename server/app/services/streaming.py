@@ -0,0 +1,318 @@
+import os
+import stat
+import time
+import secrets
+import asyncio
+import anyio
+import aiofiles
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from app.core.config import settings
+from app.services import metrics
+
+MAX_RANGES = 16
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def make_etag(st: os.stat_result):
+    # size + mtime + inode: scanner'ın parmak iziyle aynı bilgi, dosya değişince değişir
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}-{st.st_ino & 0xFFFFFFFF:x}"'
+
+def parse_range(header: str, size: int):
+    # [(start, end)] (end dahil); anlaşılmayan başlıkta None -> tüm dosya gönderilir
+    units, _, spec = header.partition("=")
+    if units.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if first.strip() == "":
+                # suffix: bytes=-500 -> son 500 byte
+                length = int(last)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last.strip() else None
+                if end is not None and end < start:
+                    return None
+                if start >= size:
+                    continue
+                end = size - 1 if end is None else min(end, size - 1)
+        except ValueError:
+            return None
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def etag_matches(header: str, etag: str, weak: bool = True):
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def _not_modified_since(header: str, mtime: float):
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+_send_mode_logged = False
+
+def _log_send_mode(extensions):
+    # sunucunun sendfile yolunu destekleyip desteklemediği ilk yayında bir kez yazılır
+    global _send_mode_logged
+    if _send_mode_logged:
+        return
+    _send_mode_logged = True
+    if "http.response.zerocopy" in extensions or "http.response.pathsend" in extensions:
+        print("Audio streams: zero-copy send available")
+    else:
+        print("Audio streams: ASGI server has no zerocopy/pathsend extension, reading files in python")
+
+class AudioFileResponse(Response):
+    # range (suffix ve çoklu dahil), ETag / If-None-Match / If-Range destekli dosya yanıtı.
+    # sunucu ASGI zerocopy ya da pathsend eklentisini destekliyorsa dosya bölgesi
+    # doğrudan kernel'e (sendfile) verilir, python tarafında byte kopyalanmaz.
+    # yoksa aiofiles ile event loop üzerinden okunur; starlette threadpool'unu işgal etmez.
+    # NOT: main.py'nin çalıştırdığı uvicorn bu eklentilerin ikisini de uygulamıyor, yani onunla
+    # her yayın python'da parça parça okunup gönderilir. sendfile için eklentiyi uygulayan bir
+    # ASGI sunucusu gerekir (ör. granian pathsend'i destekliyor: tam dosya yanıtları kernel'den gider)
+    def __init__(self, path: str, stat_result: os.stat_result, media_type: str, headers=None, seek_to=None):
+        self.path = path
+        # (saniye, offset): Range yoksa yanıt bu frame'den başlar
+        self.seek_to = seek_to
+        self.stat_result = stat_result
+        self.status_code = 200
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.etag = make_etag(stat_result)
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = self.etag
+        self.headers["last-modified"] = self.last_modified
+        if seek_to:
+            self.headers["x-seek-time"] = f"{seek_to[0]:.3f}"
+            self.headers["x-seek-offset"] = str(seek_to[1])
+
+    def _range_allowed(self, if_range: str):
+        if if_range is None:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            # If-Range güçlü karşılaştırma ister
+            return if_range == self.etag
+        return if_range == self.last_modified
+
+    async def __call__(self, scope, receive, send):
+        request_headers = Headers(scope=scope)
+        size = self.stat_result.st_size
+        head_only = scope["method"].upper() == "HEAD"
+        extensions = scope.get("extensions") or {}
+        self.zerocopy = "http.response.zerocopy" in extensions
+        _log_send_mode(extensions)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, self.etag)
+        else:
+            since = request_headers.get("if-modified-since")
+            not_modified = since is not None and _not_modified_since(since, self.stat_result.st_mtime)
+        if not_modified:
+            self.status_code = 304
+            if "content-type" in self.headers:
+                del self.headers["content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if range_header and self._range_allowed(request_headers.get("if-range")):
+            try:
+                ranges = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                response = Response(status_code=416, headers={"content-range": f"bytes */{size}", "accept-ranges": "bytes"})
+                return await response(scope, receive, send)
+
+        if not ranges and self.seek_to:
+            if self.seek_to[1] >= size:
+                # parçanın sonundan ötesi
+                response = Response(status_code=416, headers={"content-range": f"bytes */{size}", "accept-ranges": "bytes"})
+                return await response(scope, receive, send)
+            ranges = [(self.seek_to[1], size - 1)]
+
+        if not ranges:
+            self.headers["content-length"] = str(size)
+            if not head_only and "http.response.pathsend" in extensions and not self.zerocopy:
+                await send({"type": "http.response.start", "status": 200, "headers": self.raw_headers})
+                await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+                metrics.stream_bytes.inc(size)
+                return
+            parts = [(None, 0, size - 1)] if size else []
+            status = 200
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+            parts = [(None, start, end)]
+            status = 206
+        else:
+            boundary = secrets.token_hex(13)
+            part_type = self.headers.get("content-type", "application/octet-stream")
+            parts = []
+            length = 0
+            for start, end in ranges:
+                preamble = (
+                    f"--{boundary}\r\ncontent-type: {part_type}\r\n"
+                    f"content-range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode("latin-1")
+                parts.append((preamble, start, end))
+                length += len(preamble) + (end - start + 1) + 2
+            trailer = f"--{boundary}--\r\n".encode("latin-1")
+            length += len(trailer)
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            self.headers["content-length"] = str(length)
+            parts.append((trailer, None, None))
+            status = 206
+
+        self.status_code = status
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+        if head_only or not parts:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        metrics.active_streams.inc()
+        try:
+            async with anyio.create_task_group() as task_group:
+                async def stream():
+                    await self._send_parts(send, parts, len(ranges or ()) > 1)
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(stream)
+                while True:
+                    message = await receive()
+                    if message["type"] == "http.disconnect":
+                        task_group.cancel_scope.cancel()
+                        break
+        finally:
+            metrics.active_streams.dec()
+
+    async def _send_parts(self, send, parts, multipart: bool):
+        if self.zerocopy:
+            with open(self.path, "rb") as file:
+                await self._write_parts(send, parts, multipart, file)
+        else:
+            async with aiofiles.open(self.path, "rb") as file:
+                await self._write_parts(send, parts, multipart, file)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _write_parts(self, send, parts, multipart: bool, file):
+        throttle = Throttle(settings.STREAM_RATE_LIMIT, settings.STREAM_RATE_BURST)
+        for preamble, start, end in parts:
+            if preamble:
+                await send({"type": "http.response.body", "body": preamble, "more_body": True})
+            if start is None:
+                continue
+            if self.zerocopy:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file,
+                    "offset": start,
+                    "count": end - start + 1,
+                    "more_body": True,
+                })
+                metrics.stream_bytes.inc(end - start + 1)
+            else:
+                await self._send_region(send, file, start, end - start + 1, throttle)
+            if multipart:
+                await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+
+    async def _send_region(self, send, file, offset: int, count: int, throttle):
+        # bir parça gönderilirken sıradaki okunur: yayın başına en fazla 2 parça bellekte.
+        # send() istemci yavaşsa bekler (backpressure), okumalar da global sınırla kısıtlı.
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        await file.seek(offset)
+        next_read = asyncio.ensure_future(_limited_read(file, min(chunk_size, count)))
+        try:
+            while count > 0:
+                chunk = await next_read
+                if not chunk:
+                    break
+                count -= len(chunk)
+                if count > 0:
+                    next_read = asyncio.ensure_future(_limited_read(file, min(chunk_size, count)))
+                await throttle.wait(len(chunk))
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                metrics.stream_bytes.inc(len(chunk))
+        finally:
+            if not next_read.done():
+                next_read.cancel()
+
+class Throttle:
+    # bağlantı başına token bucket; ilk burst byte'ı beklemeden gider
+    def __init__(self, rate: int, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.allowance = burst
+        self.last = time.monotonic()
+
+    async def wait(self, size: int):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.allowance = min(self.allowance + (now - self.last) * self.rate, max(self.burst, size))
+        self.last = now
+        if self.allowance < size:
+            await asyncio.sleep((size - self.allowance) / self.rate)
+            self.allowance = 0
+            self.last = time.monotonic()
+        else:
+            self.allowance -= size
+
+_read_slots = None
+
+async def _limited_read(file, size: int):
+    # eşzamanlı disk okuma sayısı sınırlı; seek fırtınası diski kilitlemesin
+    global _read_slots
+    if _read_slots is None:
+        _read_slots = asyncio.Semaphore(settings.STREAM_MAX_CONCURRENT_READS)
+    async with _read_slots:
+        return await file.read(size)
+
+def open_stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st
@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from app.core.config import settings
+from app.services import covers
+
+# kapak küçük resimleri: sabit boyutlar (64/256/512/1024), webp ve jpeg.
+# taramada yazılan kapaklar için arka planda üretilir, eksik olan ilk istekte üretilir.
+
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_executor = None
+_lock = threading.Lock()
+_queued = set()
+# açılamayan görseller; süreç boyunca tekrar denenmez
+_broken = set()
+
+def pick_size(size: int):
+    # istenenden büyük ya da eşit ilk boyut; en büyüğünü de aşıyorsa orijinal (None)
+    for candidate in sorted(settings.COVER_THUMBNAIL_SIZES):
+        if candidate >= size:
+            return candidate
+    return None
+
+def pick_format(accept: str):
+    return "webp" if "image/webp" in accept else "jpeg"
+
+def path_for(cover_hash: str, size: int, fmt: str):
+    return f"{covers.path_for(cover_hash)}_{size}.{fmt}"
+
+def render(cover_hash: str, size: int, fmt: str):
+    path = path_for(cover_hash, size, fmt)
+    with Image.open(covers.path_for(cover_hash)) as img:
+        # jpeg'de draft, decode sırasında ölçekler: 3000px kapak tam açılmaz
+        img.draft("RGB", (size, size))
+        if fmt == "jpeg" or img.mode not in ("RGBA", "LA", "P"):
+            img = img.convert("RGB")
+        else:
+            img = img.convert("RGBA")
+        img.thumbnail((size, size), Image.LANCZOS)
+
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        if fmt == "webp":
+            img.save(tmp, "WEBP", quality=settings.COVER_THUMBNAIL_QUALITY, method=4)
+        else:
+            img.save(tmp, "JPEG", quality=settings.COVER_THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    os.replace(tmp, path)
+    return path
+
+def get(cover_hash: str, size: int, fmt: str):
+    path = path_for(cover_hash, size, fmt)
+    if os.path.exists(path):
+        return path
+    if cover_hash in _broken:
+        return None
+    try:
+        return render(cover_hash, size, fmt)
+    except Exception as e:
+        _broken.add(cover_hash)
+        print(f"Failed to render thumbnail for {cover_hash}: {e}")
+        return None
+
+def response(request, cover_hash: str, size: int):
+    size = pick_size(size)
+    if size is None:
+        return covers.response(request, cover_hash)
+
+    fmt = pick_format(request.headers.get("accept", ""))
+
+    def resolve():
+        path = get(cover_hash, size, fmt)
+        if path:
+            return path, FORMATS[fmt]
+        # bozuk görsel: küçültülemiyorsa orijinali ver
+        original = covers.path_for(cover_hash)
+        return original, covers.media_type(original)
+
+    return covers.cached_response(request, f'"{cover_hash}-{size}-{fmt}"', resolve, vary="Accept")
+
+def _generate(cover_hash: str):
+    try:
+        if not covers.exists(cover_hash):
+            return
+        for size in settings.COVER_THUMBNAIL_SIZES:
+            for fmt in FORMATS:
+                if not get(cover_hash, size, fmt):
+                    return
+    finally:
+        with _lock:
+            _queued.discard(cover_hash)
+
+def schedule(cover_hashes):
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.COVER_THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+        for cover_hash in cover_hashes:
+            if cover_hash and cover_hash not in _queued:
+                _queued.add(cover_hash)
+                _executor.submit(_generate, cover_hash)
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _queued.clear()
+    if executor:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,39 @@
+import uuid
+import threading
+
+# kütüphane her değiştiğinde artan sayaç; cache'ler bununla O(1) geçersizleşir.
+# favoriler ve çalma listeleri için de ayrı sayaçlar: json uçlarının ETag'leri bunlardan üretilir,
+# böylece If-None-Match db'ye gitmeden cevaplanır. sayaçlar bellekte (tek process), yeniden başlayınca
+# sıfırlanırlar; boot id ETag'e girdiği için eski ETag'ler yeni process'te eşleşmez
+_lock = threading.Lock()
+boot_id = uuid.uuid4().hex[:8]
+library_generation = 0
+favorites_version = 0
+playlists_version = 0
+_playlist_versions = {}
+
+def bump_library():
+    global library_generation
+    with _lock:
+        library_generation += 1
+        return library_generation
+
+def bump_favorites():
+    global favorites_version
+    with _lock:
+        favorites_version += 1
+
+def bump_playlist(playlist_id: int = None):
+    # liste görünümü (isim, parça sayısı) her değişiklikte; detay sadece ilgili listede
+    global playlists_version
+    with _lock:
+        playlists_version += 1
+        if playlist_id is not None:
+            _playlist_versions[playlist_id] = _playlist_versions.get(playlist_id, 0) + 1
+
+def playlist_version(playlist_id: int):
+    return _playlist_versions.get(playlist_id, 0)
+
+def etag(*parts):
+    # tırnaklı opak değer; yanıtta zayıf (W/) olarak gönderilir
+    return '"' + "-".join(str(part) for part in (boot_id,) + parts) + '"'
@@ -1,15 +1,94 @@
-
 import os
 import time
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from app.core.config import settings
-from app.services import scanner
+from app.services import scanner, metrics, thumbnails
+from app.services.ingest import LibraryWriter
+from app.models.music import Track
 from app.db.session import SessionLocal
 
+UPSERT = "upsert"
+DELETE = "delete"
+
+class EventQueue:
+    # aynı path için gelen olaylar tek kayıtta birleşir (son olay kazanır),
+    # dosya boyutu/mtime'ı settle süresi boyunca değişmeyene kadar bekletilir
+    def __init__(self, settle_seconds: float):
+        self.settle_seconds = settle_seconds
+        self._cond = threading.Condition()
+        self._events = {}
+
+    def put(self, path: str, action: str):
+        metrics.watcher_events.inc(labels=(action,))
+        now = time.monotonic()
+        with self._cond:
+            entry = self._events.get(path)
+            if entry:
+                entry["action"] = action
+                entry["last_event"] = now
+            else:
+                self._events[path] = {"action": action, "first_seen": now, "last_event": now, "stat": None}
+            self._cond.notify()
+
+    def wait(self, timeout: float):
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def take_ready(self, limit: int):
+        now = time.monotonic()
+        with self._cond:
+            candidates = [
+                (path, dict(entry)) for path, entry in self._events.items()
+                if now - entry["last_event"] >= self.settle_seconds
+            ][:limit]
+
+        # stat kilidin dışında; kopyalanmaya devam eden dosya bir tur daha bekler
+        checked = []
+        for path, entry in candidates:
+            stat = None
+            if entry["action"] == UPSERT:
+                try:
+                    st = os.stat(path)
+                    stat = (st.st_size, st.st_mtime)
+                except OSError:
+                    entry["action"] = DELETE
+            checked.append((path, entry, stat))
+
+        ready = []
+        with self._cond:
+            for path, entry, stat in checked:
+                current = self._events.get(path)
+                if not current or current["last_event"] != entry["last_event"]:
+                    continue
+                if entry["action"] == UPSERT and stat != current["stat"]:
+                    current["stat"] = stat
+                    current["last_event"] = now
+                    continue
+                del self._events[path]
+                ready.append((path, entry["action"], entry["first_seen"]))
+        return ready
+
+    def depth(self):
+        with self._cond:
+            return len(self._events)
+
+    def lag(self):
+        with self._cond:
+            if not self._events:
+                return 0.0
+            oldest = min(entry["first_seen"] for entry in self._events.values())
+        return time.monotonic() - oldest
+
 class MusicHandler(FileSystemEventHandler):
-    def __init__(self):
+    def __init__(self, queue: EventQueue):
         self.supported_extensions = scanner.SUPPORTED_EXTENSIONS
+        self.queue = queue
 
     def _is_music_file(self, path):
         _, ext = os.path.splitext(path)
@@ -17,51 +96,134 @@ class MusicHandler(FileSystemEventHandler):
 
     def on_created(self, event):
         if not event.is_directory and self._is_music_file(event.src_path):
-            print(f"New file detected: {event.src_path}")
-            db = SessionLocal()
-            try:
-                scanner.process_file(db, event.src_path)
-            finally:
-                db.close()
+            self.queue.put(event.src_path, UPSERT)
 
     def on_deleted(self, event):
         if not event.is_directory and self._is_music_file(event.src_path):
-            print(f"File deleted: {event.src_path}")
-            db = SessionLocal()
-            try:
-                scanner.remove_file(db, event.src_path)
-            finally:
-                db.close()
+            self.queue.put(event.src_path, DELETE)
 
     def on_moved(self, event):
         if not event.is_directory and self._is_music_file(event.src_path):
-            print(f"File moved: {event.src_path} -> {event.dest_path}")
-            db = SessionLocal()
-            try:
-                scanner.remove_file(db, event.src_path)
-                if self._is_music_file(event.dest_path):
-                    scanner.process_file(db, event.dest_path)
-            finally:
-                db.close()
-                
+            self.queue.put(event.src_path, DELETE)
+        if not event.is_directory and self._is_music_file(event.dest_path):
+            self.queue.put(event.dest_path, UPSERT)
+
     def on_modified(self, event):
         if not event.is_directory and self._is_music_file(event.src_path):
-             
-             pass 
+            self.queue.put(event.src_path, UPSERT)
+
+class WatcherWriter(threading.Thread):
+    # kuyruğu boşaltan tek yazıcı thread; her tur tek transaction
+    def __init__(self, queue: EventQueue):
+        super().__init__(name="watcher-writer", daemon=True)
+        self.queue = queue
+        self.processed = 0
+        self.batches = 0
+        self.last_lag = 0.0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.queue.wake()
+
+    def run(self):
+        db = SessionLocal()
+        try:
+            writer = LibraryWriter(db, batch_size=settings.WATCH_BATCH_SIZE, commit_interval=float("inf"))
+            while not self._stop_event.is_set():
+                ready = self.queue.take_ready(settings.WATCH_BATCH_SIZE)
+                if not ready:
+                    self.queue.wait(max(self.queue.settle_seconds / 2, 0.1))
+                    continue
+                try:
+                    self._apply(db, writer, ready)
+                except Exception as e:
+                    db.rollback()
+                    print(f"Watcher batch failed: {e}")
+        finally:
+            db.close()
 
+    def _apply(self, db, writer: LibraryWriter, ready):
+        paths = [path for path, _, _ in ready]
+        known = {}
+        for i in range(0, len(paths), 500):
+            rows = db.query(Track.id, Track.file_path, Track.file_size, Track.file_mtime, Track.file_inode).filter(
+                Track.file_path.in_(paths[i:i + 500])
+            )
+            for track_id, path, size, mtime, inode in rows:
+                known[path] = (track_id, (size, mtime, inode))
+        # metadata okunurken yazma bağlantısı boşta kalsın
+        db.commit()
+
+        removals = []
+        for path, action, _ in ready:
+            existing = known.get(path)
+            if action == DELETE:
+                if existing:
+                    print(f"File deleted: {path}")
+                    removals.append(existing[0])
+                continue
+
+            try:
+                fingerprint = scanner.file_fingerprint(path)
+                if existing and existing[1] == fingerprint:
+                    continue
+                with metrics.timed(metrics.scan_parse_duration):
+                    meta = scanner.read_metadata(path)
+            except Exception as e:
+                print(f"Failed to read metadata for {path}: {e}")
+                continue
+            if meta:
+                print(f"{'File changed' if existing else 'New file detected'}: {path}")
+                cover = scanner.find_folder_cover(os.path.dirname(path))
+                writer.add(meta, cover, fingerprint, existing[0] if existing else None)
+
+        writer.remove(removals)
+        writer.flush()
+        thumbnails.schedule(writer.take_cover_hashes())
+
+        now = time.monotonic()
+        self.last_lag = max(now - first_seen for _, _, first_seen in ready)
+        metrics.watcher_batch_lag.observe(self.last_lag)
+        self.processed += len(ready)
+        self.batches += 1
+
+events = EventQueue(settings.WATCH_SETTLE_SECONDS)
+
+metrics.Gauge("tsukuyomi_watcher_queue_depth", "Paths waiting in the watcher queue", collect=lambda: [((), events.depth())])
+metrics.Gauge("tsukuyomi_watcher_queue_lag_seconds", "Age of the oldest queued watcher event", collect=lambda: [((), events.lag())])
 observer = Observer()
+writer_thread = None
+
+def stats():
+    return {
+        "running": observer.is_alive(),
+        "queue_depth": events.depth(),
+        "queue_lag_seconds": round(events.lag(), 3),
+        "last_batch_lag_seconds": round(writer_thread.last_lag, 3) if writer_thread else 0.0,
+        "processed_events": writer_thread.processed if writer_thread else 0,
+        "batches": writer_thread.batches if writer_thread else 0,
+    }
 
 def start_watcher():
+    global writer_thread
     if not os.path.exists(settings.MUSIC_DIRECTORY):
         print(f"Music directory not found: {settings.MUSIC_DIRECTORY}. Watcher not started.")
         return
 
-    event_handler = MusicHandler()
+    writer_thread = WatcherWriter(events)
+    writer_thread.start()
+
+    event_handler = MusicHandler(events)
     observer.schedule(event_handler, settings.MUSIC_DIRECTORY, recursive=True)
     observer.start()
     print(f"Watcher started on {settings.MUSIC_DIRECTORY}")
 
 def stop_watcher():
-    observer.stop()
-    observer.join()
+    if observer.is_alive():
+        observer.stop()
+        observer.join()
+    if writer_thread:
+        writer_thread.stop()
+        writer_thread.join()
     print("Watcher stopped")
@@ -0,0 +1,369 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from benchmarks import synthetic
+
+# kullanım (server/ klasöründen):
+#   python -m benchmarks run --tracks 10k --output bench-10k.json
+#   python -m benchmarks compare eski.json yeni.json
+# kütüphane --workdir altında boyut+seed başına bir kez üretilir, db her koşuda sıfırdan kurulur.
+# sonuçlar commit'ler arasında karşılaştırılabilir json
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pick(50) * 1000, 3),
+        "p90_ms": round(pick(90) * 1000, 3),
+        "p99_ms": round(pick(99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+def _prepare_environment(args, library_dir):
+    # app import edilmeden önce: ayarlar import anında okunuyor
+    db_path = os.path.join(args.workdir, "bench.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    covers_dir = os.path.join(args.workdir, "covers")
+    shutil.rmtree(covers_dir, ignore_errors=True)
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    os.environ["MUSIC_DIRECTORY"] = library_dir
+    os.environ["COVER_CACHE_DIRECTORY"] = covers_dir
+    os.environ["STARTUP_SCAN"] = "false"
+    os.environ["WATCH_SETTLE_SECONDS"] = str(args.settle)
+    if args.workers is not None:
+        os.environ["SCAN_WORKERS"] = str(args.workers)
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+
+def bench_scan(results):
+    from app.db.session import SessionLocal
+    from app.services import scanner
+
+    for name in ("initial", "noop"):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            result = scanner.scan_library(db)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        files = sum(result.get(key) or 0 for key in ("added_tracks", "updated_tracks", "unchanged_tracks", "failed"))
+        results["scan_" + name] = {
+            "seconds": round(elapsed, 3),
+            "files": files,
+            "added": result.get("added_tracks"),
+            "updated": result.get("updated_tracks"),
+            "files_per_sec": round(files / elapsed, 1) if elapsed else None,
+        }
+
+def bench_search_index(results):
+    from app.db.session import ReadSessionLocal
+    from app.services import search_index
+
+    db = ReadSessionLocal()
+    try:
+        started = time.perf_counter()
+        search_index.index.build(db)
+        results["search_index_build"] = {"seconds": round(time.perf_counter() - started, 3)}
+    finally:
+        db.close()
+
+def bench_search(results, queries, rounds: int):
+    from app.db.session import ReadSessionLocal
+    from app.services import library
+
+    # library.search doğrudan: sonuç cache'i devre dışı, saf sorgu maliyeti
+    samples = []
+    hits = 0
+    db = ReadSessionLocal()
+    try:
+        for _ in range(rounds):
+            for query in queries:
+                started = time.perf_counter()
+                found = library.search(db, query, 50)
+                samples.append(time.perf_counter() - started)
+                hits += bool(found)
+    finally:
+        db.close()
+    results["search"] = dict(percentiles(samples), queries=len(queries), hit_ratio=round(hits / len(samples), 3))
+
+async def _timed_get(client, url, samples, **kwargs):
+    started = time.perf_counter()
+    response = await client.get(url, **kwargs)
+    samples.append(time.perf_counter() - started)
+    response.raise_for_status()
+    return response
+
+async def bench_http(results, queries, args):
+    import httpx
+    from app.main import app
+    from app.db.session import SessionLocal
+    from app.models.music import Track, Favorite, Playlist, PlaylistTrack
+
+    # favori ve çalma listeleri: gerçek kullanıma yakın boyutlar
+    rnd = random.Random(args.seed)
+    db = SessionLocal()
+    try:
+        sizes = dict(db.query(Track.id, Track.file_size).order_by(Track.id))
+        track_ids = list(sizes)
+        for track_id in rnd.sample(track_ids, min(len(track_ids), args.favorites)):
+            db.add(Favorite(track_id=track_id))
+        playlist_ids = []
+        for n in range(args.playlists):
+            playlist = Playlist(name=f"Bench {n}")
+            db.add(playlist)
+            db.flush()
+            size = min(len(track_ids), args.playlist_size)
+            for position, track_id in enumerate(rnd.sample(track_ids, size)):
+                db.add(PlaylistTrack(playlist_id=playlist.id, track_id=track_id, position=position))
+            playlist_ids.append(playlist.id)
+        db.commit()
+    finally:
+        db.close()
+
+    # lifespan yok: watcher/tarama açılmaz, sadece istek yolu ölçülür
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        api = "/api/v1/music"
+
+        samples = []
+        for query in queries:
+            await _timed_get(client, f"{api}/search", samples, params={"q": query})
+        warm = []
+        for query in queries:
+            await _timed_get(client, f"{api}/search", warm, params={"q": query})
+        results["http_search"] = {"cold": percentiles(samples), "cached": percentiles(warm)}
+
+        for name, url in (("favorites", f"{api}/favorites"), ("playlists", f"{api}/playlists")):
+            samples = []
+            for _ in range(args.render_rounds):
+                await _timed_get(client, url, samples)
+            results["http_" + name] = percentiles(samples)
+        samples = []
+        for _ in range(args.render_rounds):
+            for playlist_id in playlist_ids:
+                await _timed_get(client, f"{api}/playlists/{playlist_id}", samples)
+        results["http_playlist_detail"] = dict(percentiles(samples), tracks=args.playlist_size)
+        samples = []
+        for _ in range(args.render_rounds):
+            await _timed_get(client, f"{api}/tracks", samples, params={"limit": 100})
+        results["http_browse_tracks"] = percentiles(samples)
+
+        # eşzamanlı range istekleri: her istemci rastgele parçaların rastgele aralıklarını ister
+        total_bytes = 0
+        latencies = []
+
+        async def streamer(worker: int):
+            nonlocal total_bytes
+            local = random.Random(args.seed + worker)
+            for _ in range(args.stream_requests):
+                track_id = local.choice(track_ids)
+                start = local.randrange(0, max(1, sizes[track_id] - args.range_bytes))
+                response = await _timed_get(
+                    client, f"{api}/stream/{track_id}", latencies,
+                    headers={"Range": f"bytes={start}-{start + args.range_bytes - 1}"}
+                )
+                total_bytes += len(response.content)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(streamer(worker) for worker in range(args.streams)))
+        elapsed = time.perf_counter() - started
+        results["stream_ranges"] = dict(
+            percentiles(latencies),
+            concurrency=args.streams,
+            seconds=round(elapsed, 3),
+            requests_per_sec=round(len(latencies) / elapsed, 1),
+            mb_per_sec=round(total_bytes / elapsed / 1024 / 1024, 2),
+        )
+
+def bench_watcher(results, library_dir, args):
+    from app.db.session import ReadSessionLocal
+    from app.models.music import Track
+    from app.services import watcher
+
+    def count():
+        db = ReadSessionLocal()
+        try:
+            return db.query(Track.id).count()
+        finally:
+            db.close()
+
+    before = count()
+    watcher.start_watcher()
+    try:
+        started = time.perf_counter()
+        synthetic.burst(library_dir, args.burst, seed=args.seed + 1000)
+        written = time.perf_counter() - started
+        deadline = started + args.burst_timeout
+        while count() < before + args.burst and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        ingested = count() - before
+    finally:
+        watcher.stop_watcher()
+        # bir sonraki koşu aynı kütüphaneyle başlasın
+        shutil.rmtree(synthetic.album_dir(library_dir, "Burst Artist", f"Burst {args.seed + 1000}"), ignore_errors=True)
+        parent = os.path.join(library_dir, "Burst Artist")
+        if os.path.isdir(parent) and not os.listdir(parent):
+            os.rmdir(parent)
+
+    results["watcher_burst"] = {
+        "files": args.burst,
+        "ingested": ingested,
+        "write_seconds": round(written, 3),
+        "seconds_to_ingest": round(elapsed, 3),
+        "settle_seconds": args.settle,
+        "timed_out": ingested < args.burst,
+    }
+
+def run(args):
+    tracks = synthetic.parse_size(args.tracks)
+    args.workdir = os.path.abspath(args.workdir)
+    library_dir = os.path.join(args.workdir, f"library-{tracks}-s{args.seed}")
+    os.makedirs(library_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    albums = synthetic.generate(library_dir, tracks, args.seed)
+    generate_seconds = time.perf_counter() - started
+    print(f"Library ready: {tracks} tracks in {len(albums)} albums ({generate_seconds:.1f}s)")
+
+    _prepare_environment(args, library_dir)
+    from app.db.session import init_db, engine
+    from app.core.config import settings
+    from app.services import fts, scanner
+    # tablolar create_all'dan önce kayıtlı olmalı
+    import app.models.music
+    init_db()
+    if settings.SEARCH_ENGINE == "fts":
+        fts.ensure_fts(engine)
+
+    queries = synthetic.query_corpus(albums, args.queries, args.seed)
+    results = {}
+    print("Scanning...")
+    bench_scan(results)
+    bench_search_index(results)
+    print("Searching...")
+    bench_search(results, queries, args.search_rounds)
+    print("HTTP...")
+    asyncio.run(bench_http(results, queries, args))
+    if args.burst:
+        print("Watcher burst...")
+        bench_watcher(results, library_dir, args)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tracks": tracks,
+            "albums": len(albums),
+            "artists": len({album[0] for album in albums}),
+            "seed": args.seed,
+            "search_engine": settings.SEARCH_ENGINE,
+            "scan_workers": scanner.resolve_workers(),
+            "generate_seconds": round(generate_seconds, 2),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+# karşılaştırmada bakılan değerler: düşük olan iyi, *_per_sec için yüksek olan iyi
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["meta"].get("tracks") != candidate["meta"].get("tracks"):
+        print("Warning: reports were produced with different library sizes")
+
+    old, new = _flatten(baseline["results"]), _flatten(candidate["results"])
+    print(f"{'metric':<44} {baseline['meta'].get('commit') or 'baseline':>12} {candidate['meta'].get('commit') or 'candidate':>12} {'change':>9}")
+    regressions = 0
+    for name in sorted(old.keys() & new.keys()):
+        if not (name.endswith(("_ms", "seconds", "_per_sec"))):
+            continue
+        before, after = old[name], new[name]
+        change = (after - before) / before * 100 if before else 0.0
+        worse = change < 0 if name.endswith("_per_sec") else change > 0
+        flag = " !" if worse and abs(change) >= args.threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<44} {before:>12} {after:>12} {change:>+8.1f}%{flag}")
+    if regressions:
+        print(f"{regressions} metrics regressed by more than {args.threshold}%")
+    return 1 if regressions and args.fail else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="tsukuyomi synthetic library benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench = commands.add_parser("run", help="Generate a synthetic library and run the benchmarks")
+    bench.add_argument("--tracks", default="1k", help="Library size: 1k, 10k, 100k or a number")
+    bench.add_argument("--seed", type=int, default=1)
+    bench.add_argument("--workdir", default=os.path.join(os.path.expanduser("~"), ".cache", "tsukuyomi-bench"))
+    bench.add_argument("--output", help="JSON report path (stdout when omitted)")
+    bench.add_argument("--workers", type=int, help="SCAN_WORKERS override")
+    bench.add_argument("--queries", type=int, default=200, help="Search query corpus size")
+    bench.add_argument("--search-rounds", type=int, default=3)
+    bench.add_argument("--favorites", type=int, default=500)
+    bench.add_argument("--playlists", type=int, default=20)
+    bench.add_argument("--playlist-size", type=int, default=200)
+    bench.add_argument("--render-rounds", type=int, default=20)
+    bench.add_argument("--streams", type=int, default=32, help="Concurrent range-stream clients")
+    bench.add_argument("--stream-requests", type=int, default=20, help="Range requests per client")
+    bench.add_argument("--range-bytes", type=int, default=64 * 1024)
+    bench.add_argument("--burst", type=int, default=200, help="Files dropped into the library for the watcher test (0 = skip)")
+    bench.add_argument("--burst-timeout", type=float, default=120.0)
+    bench.add_argument("--settle", type=float, default=0.5, help="WATCH_SETTLE_SECONDS for the watcher test")
+    bench.set_defaults(func=run)
+
+    diff = commands.add_parser("compare", help="Compare two JSON reports")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument("--threshold", type=float, default=10.0, help="Percent change reported as a regression")
+    diff.add_argument("--fail", action="store_true", help="Exit with status 1 on regressions")
+    diff.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
@@ -0,0 +1,236 @@
+import os
+import io
+import json
+import base64
+import random
+import struct
+from PIL import Image
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3, APIC
+from mutagen.flac import FLAC, Picture
+from mutagen.oggvorbis import OggVorbis
+from mutagen.ogg import OggPage
+
+# tekrarlanabilir sentetik kütüphane: aynı seed + boyut her zaman aynı dosyaları üretir.
+# dosyalar küçük ama gerçek: mp3 frame'leri, geçerli flac frame'leri (crc'li), ogg/vorbis başlıkları,
+# mutagen ile yazılmış etiketler ve gömülü kapaklar. sanatçı -> albüm -> şarkı dağılımı çarpık,
+# birkaç sanatçı kütüphanenin büyük kısmını tutuyor
+
+SYLLABLES = ["ka", "ri", "mo", "tsu", "ne", "yo", "shi", "ra", "lu", "vel", "dor", "an", "mi", "sen", "to", "ha", "ze", "ol", "qu", "ink"]
+WORDS = ["night", "moon", "river", "glass", "echo", "velvet", "harbor", "static", "neon", "winter", "ghost", "summer",
+         "signal", "paper", "orbit", "silver", "coast", "fever", "garden", "mirror", "hollow", "ember", "tide", "satellite"]
+KINDS = ("mp3", "flac", "ogg")
+MARKER = ".synthetic.json"
+
+def parse_size(value: str):
+    value = str(value).strip().lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+def _word(rnd: random.Random):
+    # sözlük kütüphaneyle büyüsün: yarısı uydurma kelime
+    if rnd.random() < 0.5:
+        return rnd.choice(WORDS)
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3)))
+
+def _name(rnd: random.Random, words: int):
+    return " ".join(_word(rnd).capitalize() for _ in range(words))
+
+def _artist_name(rnd: random.Random):
+    name = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize()
+    if rnd.random() < 0.4:
+        name += " " + rnd.choice(WORDS).capitalize()
+    return name
+
+def plan(tracks: int, seed: int = 1):
+    # [(artist, album, year, [(track no, title, kind)], folder_cover)]
+    rnd = random.Random(seed)
+    albums = []
+    remaining = tracks
+    artist_count = max(1, tracks // 40)
+    artists = list(dict.fromkeys(_artist_name(rnd) for _ in range(artist_count * 2)))[:artist_count]
+    # zipf benzeri: ilk sanatçılar daha çok albüm alır
+    weights = [1.0 / (i + 1) ** 0.8 for i in range(len(artists))]
+    used = set()
+    while remaining > 0:
+        artist = rnd.choices(artists, weights)[0]
+        size = min(remaining, rnd.randint(6, 16))
+        title = _name(rnd, rnd.randint(1, 3))
+        # aynı sanatçıda aynı albüm adı aynı klasöre düşer
+        while (artist, title) in used:
+            title = _name(rnd, rnd.randint(1, 3))
+        used.add((artist, title))
+        songs = [(n + 1, _name(rnd, rnd.randint(1, 4)), rnd.choice(KINDS)) for n in range(size)]
+        albums.append((artist, title, str(rnd.randint(1975, 2025)), songs, rnd.random() < 0.3))
+        remaining -= size
+    return albums
+
+def _cover(rnd: random.Random, size: int = 500):
+    # düz renk + birkaç blok, jpeg ~10-20 KB
+    img = Image.new("RGB", (size, size), tuple(rnd.randrange(256) for _ in range(3)))
+    for _ in range(6):
+        x, y = rnd.randrange(size), rnd.randrange(size)
+        img.paste(tuple(rnd.randrange(256) for _ in range(3)), (x, y, min(size, x + size // 3), min(size, y + size // 3)))
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=80)
+    return out.getvalue()
+
+# --- ses dosyaları ---
+
+def _crc8(data: bytes):
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+def _crc16(data: bytes):
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+def write_mp3(path: str, seconds: float):
+    # MPEG1 layer III, 128 kbps, 44.1 kHz: 417 byte'lık sabit frame'ler
+    frame = b"\xff\xfb\x90\x64" + b"\x00" * 413
+    with open(path, "wb") as f:
+        f.write(frame * int(seconds * 44100 / 1152))
+
+def write_flac(path: str, seconds: float):
+    # 4096 örneklik sabit bloklar, iki kanal CONSTANT (sessiz) subframe
+    sample_rate, block = 44100, 4096
+    frames = int(seconds * sample_rate) // block
+    total = frames * block
+    info = struct.pack(">HH", block, block) + b"\x00" * 6
+    info += ((sample_rate << 44) | (1 << 41) | (15 << 36) | total).to_bytes(8, "big") + b"\x00" * 16
+    out = bytearray(b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info)
+    for number in range(frames):
+        header = b"\xff\xf8\xc9\x18" + chr(number).encode("utf-8")
+        header += bytes([_crc8(header)])
+        body = header + b"\x00\x00\x00" * 2
+        out += body + _crc16(body).to_bytes(2, "big")
+    with open(path, "wb") as f:
+        f.write(out)
+
+def write_ogg(path: str, seconds: float):
+    # başlıklar + ~128 kbps boyutunda boş ses paketleri
+    ident = b"\x01vorbis" + struct.pack("<IBIiiiBB", 0, 2, 44100, 0, 128000, 0, 0xB8, 1)
+    comment = b"\x03vorbis" + struct.pack("<I", 4) + b"test" + struct.pack("<I", 0) + b"\x01"
+    setup = b"\x05vorbis" + b"\x00" * 32
+    audio = [b"\x00" * 4000] * int(seconds * 4)
+    pages = []
+    for sequence, packets in enumerate(([ident], [comment, setup])):
+        page = OggPage()
+        page.packets = packets
+        page.serial = 1
+        page.sequence = sequence
+        page.first = sequence == 0
+        pages.append(page)
+    audio_pages = OggPage.from_packets(audio, sequence=2)
+    for page in audio_pages:
+        page.serial = 1
+    audio_pages[-1].position = int(44100 * seconds)
+    audio_pages[-1].last = True
+    with open(path, "wb") as f:
+        for page in pages + audio_pages:
+            f.write(page.write())
+
+def write_track(path: str, kind: str, tags: dict, cover: bytes = None, seconds: float = 5.0):
+    if kind == "mp3":
+        write_mp3(path, seconds)
+        easy = EasyID3()
+        easy.update(tags)
+        easy.save(path)
+        if cover:
+            id3 = ID3(path)
+            id3.add(APIC(mime="image/jpeg", type=3, desc="", data=cover))
+            id3.save()
+    elif kind == "flac":
+        write_flac(path, seconds)
+        audio = FLAC(path)
+        audio.update(tags)
+        if cover:
+            picture = Picture()
+            picture.data, picture.mime, picture.type = cover, "image/jpeg", 3
+            audio.add_picture(picture)
+        audio.save()
+    else:
+        write_ogg(path, seconds)
+        audio = OggVorbis(path)
+        audio.update(tags)
+        if cover:
+            picture = Picture()
+            picture.data, picture.mime, picture.type = cover, "image/jpeg", 3
+            audio["metadata_block_picture"] = [base64.b64encode(picture.write()).decode("ascii")]
+        audio.save()
+
+def album_dir(root: str, artist: str, album: str):
+    return os.path.join(root, artist, album)
+
+def generate(root: str, tracks: int, seed: int = 1, seconds: float = 5.0):
+    # aynı parametrelerle üretilmiş kütüphane varsa tekrar yazılmaz
+    marker_path = os.path.join(root, MARKER)
+    params = {"tracks": tracks, "seed": seed, "seconds": seconds}
+    if os.path.exists(marker_path):
+        with open(marker_path) as f:
+            if json.load(f) == params:
+                return plan(tracks, seed)
+
+    rnd = random.Random(seed + 1)
+    albums = plan(tracks, seed)
+    for artist, album, year, songs, folder_cover in albums:
+        directory = album_dir(root, artist, album)
+        os.makedirs(directory, exist_ok=True)
+        cover = _cover(rnd)
+        if folder_cover:
+            with open(os.path.join(directory, "cover.jpg"), "wb") as f:
+                f.write(cover)
+        for number, title, kind in songs:
+            tags = {"artist": artist, "album": album, "title": title, "tracknumber": str(number), "date": year}
+            path = os.path.join(directory, f"{number:02d} {title}.{kind}")
+            # klasör kapağı olan albümlerde gömülü kapak yok (gerçek kütüphanelerdeki gibi karışık)
+            write_track(path, kind, tags, None if folder_cover else cover, seconds)
+
+    with open(marker_path, "w") as f:
+        json.dump(params, f)
+    return albums
+
+def burst(root: str, count: int, seed: int = 99, seconds: float = 5.0):
+    # watcher ölçümü için: tek klasöre bir anda count yeni dosya
+    rnd = random.Random(seed)
+    directory = album_dir(root, "Burst Artist", f"Burst {seed}")
+    os.makedirs(directory, exist_ok=True)
+    cover = _cover(rnd, 300)
+    paths = []
+    for number in range(1, count + 1):
+        kind = KINDS[number % len(KINDS)]
+        path = os.path.join(directory, f"{number:04d} Burst {number}.{kind}")
+        write_track(path, kind, {"artist": "Burst Artist", "album": f"Burst {seed}", "title": f"Burst {number}", "tracknumber": str(number)}, cover, seconds)
+        paths.append(path)
+    return paths
+
+def query_corpus(albums, count: int = 200, seed: int = 7):
+    # tam isimler, önekler (yazarken), yazım hataları, çok kelimeli ve sonuçsuz sorgular
+    rnd = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        artist, album, _, songs, _ = rnd.choice(albums)
+        title = rnd.choice(songs)[1]
+        kind = rnd.random()
+        if kind < 0.25:
+            queries.append(title)
+        elif kind < 0.45:
+            queries.append(artist[:max(2, len(artist) // 2)])
+        elif kind < 0.65:
+            word = rnd.choice((artist, album, title)).split()[0]
+            i = rnd.randrange(len(word) - 1) if len(word) > 2 else 0
+            queries.append(word[:i] + word[i + 1] + word[i] + word[i + 2:] if len(word) > 2 else word)
+        elif kind < 0.9:
+            queries.append(f"{artist.split()[0]} {title.split()[0]}")
+        else:
+            queries.append("".join(rnd.choice("xzqjv") for _ in range(6)))
+    return queries
@@ -1,6 +1,9 @@
 import uvicorn
 import sys
+import multiprocessing
 
 if __name__ == "__main__":
+    # paketlenmiş (frozen) exe'de tarama process pool'u için gerekli
+    multiprocessing.freeze_support()
     is_frozen = getattr(sys, 'frozen', False)
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=not is_frozen)
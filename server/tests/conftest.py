@@ -0,0 +1,42 @@
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+# ayarlar import anında okunuyor: app'ten önce geçici db / klasörler
+_root = tempfile.mkdtemp(prefix="tsukuyomi-tests-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_root, 'test.db')}"
+os.environ["MUSIC_DIRECTORY"] = os.path.join(_root, "music")
+os.environ["COVER_CACHE_DIRECTORY"] = os.path.join(_root, "covers")
+os.environ["STARTUP_SCAN"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import init_db, SessionLocal
+import app.models.music
+
+init_db()
+
+@pytest.fixture
+def music_dir():
+    path = tempfile.mkdtemp(dir=_root)
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client():
+    # lifespan açılmaz: watcher ve açılış taraması yok
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_root, ignore_errors=True)
@@ -0,0 +1,45 @@
+from sqlalchemy import text
+from app.db.session import engine, init_db
+from app.models.music import Track, Artist, Album
+
+def _add_tracks(db, name, count):
+    artist = Artist(name=name)
+    album = Album(title=name, artist=artist)
+    db.add_all([Track(title=f"{name} {n}", file_path=f"/nowhere/{name}-{n}.mp3", artist=artist, album=album) for n in range(count)])
+    db.commit()
+
+def _walk(client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/api/v1/music/tracks", params=query).json()
+        ids += [item["id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor or pages > 50:
+            return ids
+
+def _drop_added_at():
+    # baştaki şema: tracks.added_at yok
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_tracks_added_at_id"))
+        conn.execute(text("ALTER TABLE tracks DROP COLUMN added_at"))
+
+def test_added_sort_pages_through_backfilled_rows(db, client):
+    _add_tracks(db, "Backfilled", 5)
+    _drop_added_at()
+    init_db()
+
+    ids = _walk(client, sort="added", limit=2)
+    total = db.query(Track).count()
+    assert len(ids) == total
+    assert len(set(ids)) == total
+
+def test_added_sort_repairs_old_backfill(db, client):
+    _add_tracks(db, "Old Backfill", 5)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE tracks SET added_at = CURRENT_TIMESTAMP"))
+    init_db()
+
+    ids = _walk(client, sort="added", limit=2)
+    assert sorted(ids) == sorted(id for (id,) in db.query(Track.id))
@@ -0,0 +1,38 @@
+import os
+import threading
+from app.services import covers
+
+def test_concurrent_store_of_the_same_cover():
+    data = os.urandom(4096)
+    start = threading.Barrier(8)
+    results, errors = [], []
+    def store():
+        start.wait()
+        try:
+            results.append(covers.store(data))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=store) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(results)) == 1
+    path = covers.path_for(results[0])
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+
+def test_store_when_another_writer_wins_the_rename(monkeypatch):
+    data = os.urandom(2048)
+    replace = os.replace
+    def racing_replace(src, dst):
+        # başka bir yazan önce bitirdi, bizim rename'imiz başarısız
+        replace(src, dst)
+        raise PermissionError("destination in use")
+    monkeypatch.setattr(os, "replace", racing_replace)
+
+    cover_hash = covers.store(data)
+    assert covers.exists(cover_hash)
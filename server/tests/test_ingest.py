@@ -0,0 +1,56 @@
+import os
+from benchmarks import synthetic
+from app.models.music import Track
+from app.services import scanner
+from app.services.ingest import LibraryWriter
+from app.core.config import settings
+
+def _write_tracks(directory, count, start=1):
+    paths = []
+    for number in range(start, start + count):
+        path = os.path.join(directory, f"{number:02d} Song {number}.mp3")
+        synthetic.write_track(path, "mp3", {"artist": "Artist", "album": "Album", "title": f"Song {number}", "tracknumber": str(number)})
+        paths.append(path)
+    return paths
+
+def test_failed_removal_does_not_abort_the_batch(db, music_dir, monkeypatch):
+    paths = _write_tracks(music_dir, 2)
+    scanner.scan_library(db, music_dir)
+    keep_id, bad_id = [db.query(Track.id).filter(Track.file_path == path).scalar() for path in paths]
+    new_path = _write_tracks(music_dir, 1, start=3)[0]
+
+    # bad_id'yi içeren her yazma patlar: önce toplu yazma, sonra tek tek denemede
+    original = LibraryWriter._write
+    def failing_write(self, items, removals):
+        if bad_id in removals:
+            raise RuntimeError("removal failed")
+        return original(self, items, removals)
+    monkeypatch.setattr(LibraryWriter, "_write", failing_write)
+
+    writer = LibraryWriter(db, batch_size=100, commit_interval=3600)
+    writer.remove([keep_id, bad_id])
+    writer.add(scanner.read_metadata(new_path))
+    writer.close()
+
+    assert writer.failed == 1
+    assert writer.removed == 1
+    assert writer.added == 1
+    db.expire_all()
+    assert db.get(Track, keep_id) is None
+    assert db.get(Track, bad_id) is not None
+    assert db.query(Track.id).filter(Track.file_path == new_path).scalar() is not None
+
+def test_parallel_scan_uses_spawned_workers(db, music_dir, monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_CHUNK_SIZE", 2)
+    paths = _write_tracks(music_dir, 6)
+    contexts = []
+    pool = scanner.ProcessPoolExecutor
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs.get("mp_context"))
+        return pool(*args, **kwargs)
+    monkeypatch.setattr(scanner, "ProcessPoolExecutor", recording_pool)
+
+    result = scanner.scan_library(db, music_dir, workers=2)
+
+    assert [context.get_start_method() for context in contexts] == ["spawn"]
+    assert result["added_tracks"] == len(paths)
@@ -0,0 +1,85 @@
+import pytest
+from app.models.music import Track, Artist, Album, PlaylistTrack
+from app.services import playlists
+
+@pytest.fixture
+def track_ids(db):
+    artist = Artist(name="Playlist Artist")
+    album = Album(title="Playlist Album", artist=artist)
+    tracks = [Track(title=f"Playlist {n}", file_path=f"/nowhere/playlist-{n}.mp3", artist=artist, album=album) for n in range(5)]
+    db.add_all(tracks)
+    db.commit()
+    ids = [track.id for track in tracks]
+    # id'leri okumak işlem açtı; tek yazıcı bağlantısı istemciye kalsın
+    db.commit()
+    yield ids
+    db.query(PlaylistTrack).filter(PlaylistTrack.track_id.in_(ids)).delete(synchronize_session=False)
+    db.query(Track).filter(Track.id.in_(ids)).delete(synchronize_session=False)
+    db.delete(album)
+    db.delete(artist)
+    db.commit()
+
+@pytest.fixture
+def playlist_id(client):
+    return client.post("/api/v1/music/playlists", params={"name": "Ops"}).json()["id"]
+
+def _apply(client, playlist_id, *operations):
+    return client.post(f"/api/v1/music/playlists/{playlist_id}/tracks", json={"operations": list(operations)})
+
+def _order(client, playlist_id):
+    tracks = client.get(f"/api/v1/music/playlists/{playlist_id}").json()["tracks"]
+    positions = [track["position"] for track in tracks]
+    assert positions == sorted(set(positions))
+    return [track["id"] for track in tracks], positions
+
+def test_add_at_index(client, playlist_id, track_ids):
+    a, b, c, d, _ = track_ids
+    assert _apply(client, playlist_id, {"op": "add", "track_ids": [a, b, c]}).json() == {"added": 3, "removed": 0, "moved": 0, "skipped": []}
+    result = _apply(client, playlist_id, {"op": "add", "track_ids": [d, a], "index": 1}).json()
+    assert (result["added"], result["skipped"]) == (1, [a])
+    assert _order(client, playlist_id)[0] == [a, d, b, c]
+
+def test_move_writes_only_the_moved_entry(client, playlist_id, track_ids):
+    a, b, c, d, _ = track_ids
+    _apply(client, playlist_id, {"op": "add", "track_ids": [a, b, c, d]})
+    _, before = _order(client, playlist_id)
+    assert _apply(client, playlist_id, {"op": "move", "track_id": d, "index": 0}).json()["moved"] == 1
+    order, after = _order(client, playlist_id)
+    assert order == [d, a, b, c]
+    assert after[1:] == before[:3]
+
+def test_remove(client, playlist_id, track_ids):
+    a, b, c, d, e = track_ids
+    _apply(client, playlist_id, {"op": "add", "track_ids": [a, b, c]})
+    # aynı istekte eklenip çıkarılan kayıt hiç yazılmaz
+    result = _apply(client, playlist_id, {"op": "add", "track_ids": [d]}, {"op": "remove", "track_ids": [b, d, e]}).json()
+    assert (result["added"], result["removed"]) == (1, 2)
+    assert _order(client, playlist_id)[0] == [a, c]
+
+def test_renumbers_when_the_gap_runs_out(db, client, playlist_id, track_ids):
+    a, b, c, d, _ = track_ids
+    _apply(client, playlist_id, {"op": "add", "track_ids": [a, b, c]})
+    # eski db'lerdeki gibi ardışık pozisyonlar: araya yer yok
+    for position, track_id in enumerate([a, b, c], start=1):
+        db.query(PlaylistTrack).filter(PlaylistTrack.playlist_id == playlist_id, PlaylistTrack.track_id == track_id).update({"position": position})
+    db.commit()
+
+    _apply(client, playlist_id, {"op": "add", "track_ids": [d], "index": 1})
+    order, positions = _order(client, playlist_id)
+    assert order == [a, d, b, c]
+    assert positions == [(i + 1) * playlists.POSITION_GAP for i in range(4)]
+
+def test_missing_track_or_member_is_404_and_applies_nothing(client, playlist_id, track_ids):
+    a, b, *_ = track_ids
+    _apply(client, playlist_id, {"op": "add", "track_ids": [a]})
+
+    response = _apply(client, playlist_id, {"op": "add", "track_ids": [b, 999999]})
+    assert response.status_code == 404
+    assert response.json()["detail"] == {"message": "Tracks not found", "track_ids": [999999]}
+
+    response = _apply(client, playlist_id, {"op": "remove", "track_ids": [a]}, {"op": "move", "track_id": b, "index": 0})
+    assert response.status_code == 404
+    assert response.json()["detail"] == {"message": "Track not in playlist", "track_id": b}
+    assert _order(client, playlist_id)[0] == [a]
+
+    assert _apply(client, 999999, {"op": "add", "track_ids": [a]}).status_code == 404
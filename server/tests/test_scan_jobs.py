@@ -0,0 +1,39 @@
+import os
+from datetime import datetime, timedelta
+from benchmarks import synthetic
+from app.models.music import Track, ScanJob
+from app.services import scanner, scan_jobs
+
+def _write_tracks(directory, count):
+    for number in range(1, count + 1):
+        path = os.path.join(directory, f"{number:02d} Resume {number}.mp3")
+        synthetic.write_track(path, "mp3", {"artist": "Resume Artist", "album": "Resume Album", "title": f"Resume {number}", "tracknumber": str(number)})
+
+def test_interrupted_full_scan_resumes(db, music_dir):
+    _write_tracks(music_dir, 4)
+    started = datetime.utcnow() - timedelta(seconds=1)
+    scanner.scan_library(db, music_dir)
+
+    # ilk turda ikisi okunmuştu, kalanlar job başlamadan önceki taramadan
+    paths = sorted(path for (path,) in db.query(Track.file_path).filter(Track.file_path.startswith(music_dir)))
+    db.query(Track).filter(Track.file_path.in_(paths[2:])).update({Track.scanned_at: started - timedelta(hours=1)}, synchronize_session=False)
+    job = ScanJob(directory=music_dir, full=True, status="running", attempts=1, started_at=started)
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    # tek yazıcı bağlantısı job'a kalsın
+    db.close()
+
+    scan_jobs.run_job(job_id)
+
+    job = db.get(ScanJob, job_id)
+    assert job.status == "done"
+    assert job.files_parsed == 2
+    assert job.updated == 2
+
+def test_full_scan_without_checkpoint_rereads_everything(db, music_dir):
+    _write_tracks(music_dir, 3)
+    scanner.scan_library(db, music_dir)
+    result = scanner.scan_library(db, music_dir, full=True)
+    assert result["updated_tracks"] == 3
+    assert result["unchanged_tracks"] == 0
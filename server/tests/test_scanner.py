@@ -0,0 +1,46 @@
+import os
+import random
+import pytest
+from benchmarks import synthetic
+from app.services import scanner, covers
+
+TAGS = {"artist": "Parse Artist", "album": "Parse Album", "title": "Parse Once", "tracknumber": "3/12", "date": "2001", "genre": "Ambient"}
+
+@pytest.mark.parametrize("kind", synthetic.KINDS)
+def test_read_metadata_parses_each_file_once(music_dir, monkeypatch, kind):
+    path = os.path.join(music_dir, f"parse.{kind}")
+    synthetic.write_track(path, kind, TAGS, cover=synthetic._cover(random.Random(1), 64))
+    opened = []
+    parse = scanner.mutagen.File
+    def counting_parse(*args, **kwargs):
+        opened.append(args[0])
+        return parse(*args, **kwargs)
+    monkeypatch.setattr(scanner.mutagen, "File", counting_parse)
+    monkeypatch.setattr(covers.mutagen, "File", counting_parse)
+
+    meta = scanner.read_metadata(path)
+
+    assert opened == [path]
+    assert (meta["artist"], meta["album"], meta["title"], meta["year"], meta["genre"], meta["track_number"]) == (
+        "Parse Artist", "Parse Album", "Parse Once", "2001", "Ambient", 3
+    )
+    assert covers.exists(meta["cover_hash"])
+
+def test_rescan_schedules_only_new_covers(db, music_dir, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(scanner.thumbnails, "schedule", lambda hashes: scheduled.append(set(hashes)))
+    rnd = random.Random(2)
+    first = os.path.join(music_dir, "01 First.mp3")
+    synthetic.write_track(first, "mp3", dict(TAGS, title="First"), cover=synthetic._cover(rnd, 64))
+
+    meta = scanner.scan_library(db, music_dir)
+    assert meta["added_tracks"] == 1
+    assert len(scheduled[-1]) == 1
+
+    scanner.scan_library(db, music_dir)
+    assert scheduled[-1] == set()
+
+    second = os.path.join(music_dir, "02 Second.mp3")
+    synthetic.write_track(second, "mp3", dict(TAGS, title="Second"), cover=synthetic._cover(rnd, 64))
+    scanner.scan_library(db, music_dir)
+    assert scheduled[-1] == {scanner.read_metadata(second)["cover_hash"]}
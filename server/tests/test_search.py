@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from app.services import search_index, library
+
+def test_fuzzy_stage_runs_off_the_event_loop(client, monkeypatch):
+    calls = []
+    def fake_search(query, limit, exclude=()):
+        try:
+            asyncio.get_running_loop()
+            calls.append("loop")
+        except RuntimeError:
+            calls.append("thread")
+        return []
+    monkeypatch.setattr(search_index.index, "ready", True)
+    monkeypatch.setattr(search_index.index, "search", fake_search)
+    library.search_cache.clear()
+
+    assert client.get("/api/v1/music/search", params={"q": "nothing matches this"}).status_code == 200
+    assert calls == ["thread"]
+
+def test_index_vocabulary_stays_sorted_on_insert():
+    index = search_index.SearchIndex()
+    for track_id, title in enumerate(["zebra", "apple", "mango", "applesauce"]):
+        index.upsert(track_id, "", title, "")
+    assert index._vocab == sorted(index.postings)
+    assert index._similar_tokens("appl") >= {"apple", "applesauce"}
+
+def test_compaction_rebuilds_outside_the_lock(monkeypatch):
+    index = search_index.SearchIndex()
+    for track_id in range(1100):
+        index.upsert(track_id, "Artist", f"Song {track_id}", "Album")
+
+    acquired_during_rebuild = []
+    fresh = search_index.SearchIndex._fresh
+    def try_lock():
+        if index._lock.acquire(timeout=1):
+            index._lock.release()
+            acquired_during_rebuild.append(True)
+        else:
+            acquired_during_rebuild.append(False)
+    def watched_fresh(entries):
+        # aramalar başka thread'den kilidi alabiliyor olmalı
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        return fresh(entries)
+    monkeypatch.setattr(search_index.SearchIndex, "_fresh", staticmethod(watched_fresh))
+
+    for track_id in range(1100):
+        index.remove(track_id)
+    index.upsert(5000, "Artist", "Survivor", "Album")
+
+    assert acquired_during_rebuild == [True]
+    assert index._dead < 1000
+    assert index.search("survivor", 5) == [5000]
+
+def test_search_304_only_for_the_same_query_and_limit(client):
+    etag = client.get("/api/v1/music/search", params={"q": "Song", "limit": 10}).headers["etag"]
+    def revalidate(**params):
+        return client.get("/api/v1/music/search", params=params, headers={"If-None-Match": etag}).status_code
+
+    assert revalidate(q="Song", limit=10) == 304
+    # anahtar normalize: boşluk ve büyük/küçük harf farkı aynı sorgu
+    assert revalidate(q="  SONG ", limit=10) == 304
+    assert revalidate(q="Other", limit=10) == 200
+    assert revalidate(q="Song", limit=11) == 200
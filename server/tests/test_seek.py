@@ -0,0 +1,163 @@
+import os
+import mmap
+import wave
+import struct
+import pytest
+from mutagen.flac import FLAC, SeekTable, SeekPoint
+from mutagen.easyid3 import EasyID3
+from mutagen.wave import WAVE
+from mutagen.id3 import TIT2
+from benchmarks import synthetic
+from app.models.music import Track
+from app.services import scanner, seek
+
+TAGS = {"artist": "Seek Artist", "album": "Seek Album", "title": "Seek", "tracknumber": "1"}
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+def write_cbr_mp3(path, seconds=60.0):
+    synthetic.write_track(path, "mp3", TAGS, seconds=seconds)
+
+def write_xing_mp3(path, seconds=30.0):
+    # ilk frame'de doğrusal toc'lu Xing başlığı, ardından 128 kbps frame'ler
+    count = int(seconds * 44100 / 1152)
+    tag = b"Xing" + struct.pack(">III", 7, count, 417 * (count + 1)) + bytes(i * 256 // 100 for i in range(100))
+    header = b"\xff\xfb\x90\x64" + b"\x00" * 32 + tag
+    with open(path, "wb") as f:
+        f.write(header + b"\x00" * (417 - len(header)) + MP3_FRAME * count)
+    tags = EasyID3()
+    tags.update(TAGS)
+    tags.save(path)
+
+def write_seektable_flac(path, seconds=5.0):
+    # synthetic flac frame'leri 14 byte (frame numarası < 128), her 10 frame'de bir nokta
+    synthetic.write_track(path, "flac", TAGS, seconds=seconds)
+    audio = FLAC(path)
+    table = SeekTable(None)
+    frames = int(seconds * 44100) // 4096
+    table.seekpoints = [SeekPoint(n * 4096, n * 14, 4096) for n in range(0, frames, 10)]
+    audio.metadata_blocks.append(table)
+    audio.seektable = table
+    audio.save()
+
+def write_wav(path, seconds=10.0):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(b"\x00" * (int(44100 * seconds) * 4))
+    # etiketsiz dosyayı tarama atlıyor; id3 chunk'ı data chunk'ından sonra eklenir
+    audio = WAVE(path)
+    audio.add_tags()
+    audio.tags.add(TIT2(text=[TAGS["title"]]))
+    audio.save()
+
+WRITERS = {"cbr.mp3": write_cbr_mp3, "xing.mp3": write_xing_mp3, "seektable.flac": write_seektable_flac, "pcm.wav": write_wav}
+
+@pytest.mark.parametrize("name", list(WRITERS))
+def test_build_reads_only_the_header_region(music_dir, monkeypatch, name):
+    path = os.path.join(music_dir, name)
+    WRITERS[name](path)
+    windows = []
+    class RecordingWindow(seek._Window):
+        def __init__(self, *args):
+            super().__init__(*args)
+            windows.append(self)
+    monkeypatch.setattr(seek, "_Window", RecordingWindow)
+
+    method, blob = seek.build(path)
+
+    assert method == name.split(".")[0]
+    # baş + (mp3'te) ID3v1 kuyruğu; dosyanın geri kalanı okunmaz
+    assert windows[0].read_bytes <= 3 * 64 * 1024
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert seek.encode(seek._BUILDERS[os.path.splitext(path)[1]](data)[1]) == blob
+        data.close()
+
+def test_frame_scan_falls_back_to_the_whole_file(music_dir):
+    path = os.path.join(music_dir, "scan.flac")
+    synthetic.write_track(path, "flac", TAGS)
+    method, blob = seek.build(path)
+    assert method == "framescan"
+    assert len(seek.decode(blob)) > 1
+
+# ?t=2 için beklenen (yöntem, kesin mi, offset, x-seek-time); offset dosyanın ses başlangıcına göre
+def _audio_start(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".flac"):
+        return seek._flac_info(data)[2]
+    if path.endswith(".mp3"):
+        return seek._skip_id3(data)
+    return 44
+
+EXPECTED = {
+    # 128 kbps: 15963.28 byte/sn, 2 sn -> 31926. byte, sonraki frame başı 77. frame
+    "cbr.mp3": ("cbr", False, 77 * 417, "2.011"),
+    # toc 6-7 arası doğrusal tahmin 30579. byte, sonraki frame başı 74. frame (Xing frame'i dahil)
+    "xing.mp3": ("xing", False, 74 * 417, "2.022"),
+    # 4096 örneklik 14 byte'lık frame'ler: 88200. örneği içeren 21. frame
+    "seektable.flac": ("seektable", True, 21 * 14, "1.950"),
+    # 16 bit stereo: 88200 örnek * 4 byte
+    "pcm.wav": ("pcm", True, 88200 * 4, "2.000"),
+}
+
+@pytest.fixture(params=list(EXPECTED))
+def seek_track(request, db, music_dir):
+    path = os.path.join(music_dir, request.param)
+    WRITERS[request.param](path)
+    scanner.scan_library(db, music_dir)
+    track_id = db.query(Track.id).filter(Track.file_path == path).scalar()
+    method, exact, offset, seconds = EXPECTED[request.param]
+    return track_id, path, method, exact, _audio_start(path) + offset, seconds
+
+def test_seekmap_per_format(client, seek_track):
+    track_id, path, method, exact, offset, seconds = seek_track
+    body = client.get(f"/api/v1/music/seekmap/{track_id}").json()
+    assert (body["method"], body["exact"]) == (method, exact)
+    assert client.get(f"/api/v1/music/seekmap/{track_id}", params={"t": 2}).json() == {
+        "track_id": track_id, "time": float(seconds), "offset": offset
+    }
+
+def test_stream_seek_per_format(client, seek_track):
+    track_id, path, method, exact, offset, seconds = seek_track
+    size = os.path.getsize(path)
+    response = client.get(f"/api/v1/music/stream/{track_id}", params={"t": 2})
+    assert response.status_code == 206
+    assert response.headers["x-seek-offset"] == str(offset)
+    assert response.headers["x-seek-time"] == seconds
+    assert response.headers["content-range"] == f"bytes {offset}-{size - 1}/{size}"
+    with open(path, "rb") as f:
+        f.seek(offset)
+        assert response.content == f.read()
+
+def test_stream_seek_past_the_end_is_416(client, seek_track):
+    track_id = seek_track[0]
+    assert client.get(f"/api/v1/music/stream/{track_id}", params={"t": 9999}).status_code == 416
+
+@pytest.fixture(params=["mp3", "flac"])
+def truncated_track(request, db, music_dir):
+    # indeks tam dosyadan çıkarılır, sonra dosya diskte kısalır
+    path = os.path.join(music_dir, f"01 Song.{request.param}")
+    synthetic.write_track(path, request.param, {"artist": "Artist", "album": "Album", "title": "Song", "tracknumber": "1"})
+    scanner.scan_library(db, music_dir)
+    track = db.query(Track).filter(Track.file_path == path).one()
+    assert track.seek_method
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) // 20)
+    return track.id
+
+def test_seekmap_on_truncated_file_is_404(client, truncated_track):
+    response = client.get(f"/api/v1/music/seekmap/{truncated_track}", params={"t": 4})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Seek index not available"}
+
+def test_stream_seek_on_truncated_file_is_400(client, truncated_track):
+    response = client.get(f"/api/v1/music/stream/{truncated_track}", params={"t": 4})
+    assert response.status_code == 400
+    assert "x-seek-offset" not in response.headers
+
+def test_seek_on_missing_file_is_404(client, truncated_track, db):
+    os.remove(db.get(Track, truncated_track).file_path)
+    assert client.get(f"/api/v1/music/seekmap/{truncated_track}", params={"t": 4}).status_code == 404
+    assert client.get(f"/api/v1/music/stream/{truncated_track}", params={"t": 4}).status_code == 404
@@ -0,0 +1,83 @@
+import os
+import pytest
+from email.utils import formatdate
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.services import streaming
+
+DATA = bytes(range(256)) * 4
+
+@pytest.fixture
+def audio(music_dir):
+    path = os.path.join(music_dir, "range.mp3")
+    with open(path, "wb") as f:
+        f.write(DATA)
+    async def endpoint(request):
+        return streaming.AudioFileResponse(path, os.stat(path), "audio/mpeg")
+    client = TestClient(Starlette(routes=[Route("/a", endpoint)]))
+    return client, os.stat(path)
+
+def test_parse_range():
+    size = len(DATA)
+    assert streaming.parse_range("bytes=0-9", size) == [(0, 9)]
+    assert streaming.parse_range("bytes=-100", size) == [(size - 100, size - 1)]
+    assert streaming.parse_range("bytes=1000-", size) == [(1000, size - 1)]
+    assert streaming.parse_range("bytes=0-9,5-19,40-49", size) == [(0, 19), (40, 49)]
+    assert streaming.parse_range("bytes=5-2", size) is None
+    assert streaming.parse_range("bytes=abc", size) is None
+    assert streaming.parse_range("items=0-9", size) is None
+    with pytest.raises(streaming.RangeNotSatisfiable):
+        streaming.parse_range(f"bytes={size}-", size)
+
+def test_suffix_range(audio):
+    client, _ = audio
+    r = client.get("/a", headers={"Range": "bytes=-100"})
+    assert r.status_code == 206
+    assert r.headers["content-range"] == f"bytes {len(DATA) - 100}-{len(DATA) - 1}/{len(DATA)}"
+    assert r.content == DATA[-100:]
+
+def test_multi_range(audio):
+    client, _ = audio
+    r = client.get("/a", headers={"Range": "bytes=0-9,20-29"})
+    assert r.status_code == 206
+    assert r.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(r.headers["content-length"]) == len(r.content)
+    assert f"content-range: bytes 0-9/{len(DATA)}".encode() in r.content
+    assert f"content-range: bytes 20-29/{len(DATA)}".encode() in r.content
+    assert DATA[0:10] in r.content and DATA[20:30] in r.content
+
+@pytest.mark.parametrize("header", ["bytes=5-2", "bytes=abc"])
+def test_invalid_range_sends_whole_file(audio, header):
+    client, _ = audio
+    r = client.get("/a", headers={"Range": header})
+    assert r.status_code == 200
+    assert r.content == DATA
+
+def test_unsatisfiable_range(audio):
+    client, _ = audio
+    r = client.get("/a", headers={"Range": f"bytes={len(DATA)}-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == f"bytes */{len(DATA)}"
+
+def test_if_range_by_etag(audio):
+    client, st = audio
+    etag = streaming.make_etag(st)
+    assert client.get("/a", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    r = client.get("/a", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert r.status_code == 200 and r.content == DATA
+
+def test_if_range_by_date(audio):
+    client, st = audio
+    modified = formatdate(st.st_mtime, usegmt=True)
+    assert client.get("/a", headers={"Range": "bytes=0-9", "If-Range": modified}).status_code == 206
+    older = formatdate(st.st_mtime - 3600, usegmt=True)
+    assert client.get("/a", headers={"Range": "bytes=0-9", "If-Range": older}).status_code == 200
+
+def test_not_modified(audio):
+    client, st = audio
+    etag = client.get("/a").headers["etag"]
+    r = client.get("/a", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+    since = formatdate(st.st_mtime + 60, usegmt=True)
+    assert client.get("/a", headers={"If-Modified-Since": since}).status_code == 304